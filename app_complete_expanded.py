@@ -15,7 +15,15 @@ import plotly.express as px
 from datetime import datetime, timedelta
 import numpy as np
 import io
+import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+from features.data_processing import downcast_sensor_readings, lttb_indices
 
 # ==============================================================================
 # PAGE CONFIGURATION & ENHANCED STYLING
@@ -189,14 +197,47 @@ def render_enhanced_metric(label, value, delta=None, color="blue", icon="📊",
 # DATA LOADING FUNCTIONS FOR ALL SYSTEMS
 # ==============================================================================
 
-@st.cache_data(ttl=3600, show_spinner="Loading comprehensive energy data...")
-def load_all_energy_data():
-    """Load all CSV and Excel data with comprehensive error handling"""
+# Shared pooled session so GitHub fallbacks reuse one TCP/TLS connection and retry transient failures
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=Retry(total=2, backoff_factor=0.3)))
+
+# Sensor names are categorical here too; the loaded frames only feed observed=True groupbys
+SENSOR_CATEGORY_COLUMNS = ('entity_id', 'source_file', 'month')
+
+# Local exports read by the loader; their modification times key its cache
+LOCAL_SENSOR_FILES = {
+    'generator': 'gen (2).csv',
+    'fuel_history': 'history (5).csv',
+    'factory': 'FACTORY ELEC.csv'
+}
+LOCAL_SOLAR_FILES = (
+    'Solar_Goodwe&Fronius-Jan.csv',
+    'Solar_Goodwe&Fronius_Feb.csv',
+    'Solar_goodwe&Fronius_April.csv',
+    'Solar_goodwe&Fronius_may.csv'
+)
+LOCAL_BILLING_FILE = 'September 2025.xlsx'
+LOCAL_DATA_FILES = (*LOCAL_SENSOR_FILES.values(), *LOCAL_SOLAR_FILES, LOCAL_BILLING_FILE)
+
+def local_file_signature():
+    """(path, mtime, size) for each local export, with None for files that are missing"""
+    signature = []
+    for path in LOCAL_DATA_FILES:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+@st.cache_data(show_spinner="Loading comprehensive energy data...", max_entries=4)
+def load_all_energy_data(file_signature):
+    """Load all CSV and Excel data with comprehensive error handling (recomputed only when file_signature changes)"""
     data = {}
     
     # Load generator CSV data
     try:
-        data['generator'] = pd.read_csv('gen (2).csv')
+        data['generator'] = downcast_sensor_readings(pd.read_csv(LOCAL_SENSOR_FILES['generator'], engine='pyarrow'), SENSOR_CATEGORY_COLUMNS)
         st.success(f"✅ Generator data: {len(data['generator'])} records")
     except Exception as e:
         st.warning(f"⚠️ Generator CSV: {e}")
@@ -204,7 +245,7 @@ def load_all_energy_data():
     
     # Load fuel history CSV
     try:
-        data['fuel_history'] = pd.read_csv('history (5).csv')
+        data['fuel_history'] = downcast_sensor_readings(pd.read_csv(LOCAL_SENSOR_FILES['fuel_history'], engine='pyarrow'), SENSOR_CATEGORY_COLUMNS)
         st.success(f"✅ Fuel history: {len(data['fuel_history'])} records")
     except Exception as e:
         st.warning(f"⚠️ Fuel history CSV: {e}")
@@ -212,34 +253,31 @@ def load_all_energy_data():
     
     # Load factory consumption CSV
     try:
-        data['factory'] = pd.read_csv('FACTORY ELEC.csv')
+        data['factory'] = downcast_sensor_readings(pd.read_csv(LOCAL_SENSOR_FILES['factory'], engine='pyarrow'), SENSOR_CATEGORY_COLUMNS)
         st.success(f"✅ Factory data: {len(data['factory'])} records")
     except Exception as e:
         st.warning(f"⚠️ Factory CSV: {e}")
         data['factory'] = pd.DataFrame()
     
     # Load solar CSV files
-    solar_files = [
-        'Solar_Goodwe&Fronius-Jan.csv',
-        'Solar_Goodwe&Fronius_Feb.csv', 
-        'Solar_goodwe&Fronius_April.csv',
-        'Solar_goodwe&Fronius_may.csv'
-    ]
-    
     solar_data_list = []
-    for file in solar_files:
-        try:
-            df = pd.read_csv(file)
-            if not df.empty:
-                df['source_file'] = file
-                df['month'] = file.split('_')[-1].replace('.csv', '')
-                solar_data_list.append(df)
-                st.success(f"✅ Solar data: {file} ({len(df)} records)")
-        except Exception as e:
-            st.info(f"ℹ️ Solar file {file}: {e}")
+    # Monthly files are parsed on worker threads; results are collected here, in file order, so
+    # the status messages still render from the script thread
+    with ThreadPoolExecutor(max_workers=len(LOCAL_SOLAR_FILES)) as executor:
+        futures = [executor.submit(pd.read_csv, file, engine='pyarrow') for file in LOCAL_SOLAR_FILES]
+        for file, future in zip(LOCAL_SOLAR_FILES, futures):
+            try:
+                df = future.result()
+                if not df.empty:
+                    df['source_file'] = file
+                    df['month'] = file.split('_')[-1].replace('.csv', '')
+                    solar_data_list.append(df)
+                    st.success(f"✅ Solar data: {file} ({len(df)} records)")
+            except Exception as e:
+                st.info(f"ℹ️ Solar file {file}: {e}")
     
     if solar_data_list:
-        data['solar'] = pd.concat(solar_data_list, ignore_index=True)
+        data['solar'] = downcast_sensor_readings(pd.concat(solar_data_list, ignore_index=True), SENSOR_CATEGORY_COLUMNS)
         st.success(f"✅ Combined solar data: {len(data['solar'])} total records")
     else:
         data['solar'] = pd.DataFrame()
@@ -249,11 +287,11 @@ def load_all_energy_data():
     try:
         # Try local first, then GitHub
         try:
-            data['billing'] = pd.read_excel('September 2025.xlsx')
+            data['billing'] = pd.read_excel(LOCAL_BILLING_FILE)
         except:
             # Try from GitHub 
             billing_url = "https://raw.githubusercontent.com/Saint-Akim/Solar-performance/main/September%202025.xlsx"
-            response = requests.get(billing_url, timeout=10)
+            response = HTTP_SESSION.get(billing_url, timeout=10)
             data['billing'] = pd.read_excel(io.BytesIO(response.content))
         
         st.success(f"✅ Billing data: Available")
@@ -274,7 +312,7 @@ def calculate_comprehensive_fuel_analysis(gen_df, fuel_history_df):
         return pd.DataFrame(), {}, pd.DataFrame()
     
     # Process timestamps
-    gen_df['last_changed'] = pd.to_datetime(gen_df['last_changed'])
+    gen_df['last_changed'] = pd.to_datetime(gen_df['last_changed'], format='ISO8601')
     gen_df['state'] = pd.to_numeric(gen_df['state'], errors='coerce')
     
     # Method 1: Direct fuel consumed readings (Primary)
@@ -287,15 +325,17 @@ def calculate_comprehensive_fuel_analysis(gen_df, fuel_history_df):
     if not fuel_consumed_data.empty:
         fuel_consumed_data['date'] = fuel_consumed_data['last_changed'].dt.date
         
-        # Process daily fuel consumption
-        for date, day_data in fuel_consumed_data.groupby('date'):
-            if len(day_data) > 0:
-                fuel_reading = day_data['state'].iloc[-1]  # Last reading of day
-                daily_fuel.append({
-                    'date': pd.to_datetime(date),
-                    'fuel_consumed_liters': fuel_reading,
-                    'readings_count': len(day_data)
-                })
+        # Process daily fuel consumption - last reading of each day via a stable
+        # time sort and drop_duplicates rather than a per-day Python loop
+        readings_per_day = fuel_consumed_data['date'].value_counts()
+        daily_fuel = (
+            fuel_consumed_data.sort_values('last_changed', kind='stable')
+            .drop_duplicates(subset='date', keep='last')[['date', 'state']]
+            .rename(columns={'state': 'fuel_consumed_liters'})
+            .reset_index(drop=True)
+        )
+        daily_fuel['readings_count'] = daily_fuel['date'].map(readings_per_day).to_numpy()
+        daily_fuel['date'] = pd.to_datetime(daily_fuel['date'])
     
     # Process runtime data
     runtime_sensor_data = gen_df[gen_df['entity_id'] == 'sensor.generator_runtime_duration'].copy()
@@ -359,7 +399,7 @@ def validate_with_tank_levels(fuel_history_df):
     if fuel_history_df.empty:
         return pd.DataFrame()
     
-    fuel_history_df['last_changed'] = pd.to_datetime(fuel_history_df['last_changed'])
+    fuel_history_df['last_changed'] = pd.to_datetime(fuel_history_df['last_changed'], format='ISO8601')
     fuel_history_df['state'] = pd.to_numeric(fuel_history_df['state'], errors='coerce')
     
     start_levels = fuel_history_df[fuel_history_df['entity_id'] == 'sensor.generator_fuel_level_start'].copy()
@@ -399,7 +439,7 @@ def process_solar_performance_analysis(solar_df):
         return pd.DataFrame(), {}, pd.DataFrame()
     
     # Clean and process solar data
-    solar_df['last_changed'] = pd.to_datetime(solar_df['last_changed'])
+    solar_df['last_changed'] = pd.to_datetime(solar_df['last_changed'], format='ISO8601')
     solar_df['state'] = pd.to_numeric(solar_df['state'], errors='coerce')
     
     # Identify power sensors (Goodwe & Fronius inverters)
@@ -427,7 +467,7 @@ def process_solar_performance_analysis(solar_df):
         for date, day_data in power_sensors.groupby('date'):
             if len(day_data) > 0:
                 # Sum all inverters for each timestamp, then integrate for daily total
-                hourly_totals = day_data.groupby(['hour', 'entity_id'])['power_kw'].mean().reset_index()
+                hourly_totals = day_data.groupby(['hour', 'entity_id'], observed=True)['power_kw'].mean().reset_index()
                 daily_total_kwh = hourly_totals.groupby('hour')['power_kw'].sum().sum()  # Approximate kWh
                 
                 peak_power = day_data['power_kw'].max()
@@ -449,7 +489,7 @@ def process_solar_performance_analysis(solar_df):
         hourly_patterns = hourly_avg.to_dict('records')
         
         # Individual inverter performance
-        inverter_summary = power_sensors.groupby(['date', 'entity_id'])['power_kw'].agg(['sum', 'max', 'mean']).reset_index()
+        inverter_summary = power_sensors.groupby(['date', 'entity_id'], observed=True)['power_kw'].agg(['sum', 'max', 'mean']).reset_index()
         inverter_summary.columns = ['date', 'inverter', 'daily_kwh', 'peak_kw', 'avg_kw']
         inverter_performance = inverter_summary.to_dict('records')
     
@@ -483,6 +523,9 @@ def process_solar_performance_analysis(solar_df):
 # FACTORY LOAD ANALYSIS FUNCTIONS
 # ==============================================================================
 
+# Day labels indexed by pandas dayofweek (Monday=0), looked up positionally
+WEEKDAY_LABELS = np.array(['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'])
+
 def analyze_factory_energy_consumption(factory_df):
     """Comprehensive factory energy consumption analysis"""
     
@@ -490,7 +533,7 @@ def analyze_factory_energy_consumption(factory_df):
         return pd.DataFrame(), {}, pd.DataFrame()
     
     # Clean factory data
-    factory_df['last_changed'] = pd.to_datetime(factory_df['last_changed'])
+    factory_df['last_changed'] = pd.to_datetime(factory_df['last_changed'], format='ISO8601')
     factory_df['state'] = pd.to_numeric(factory_df['state'], errors='coerce')
     
     # Identify energy consumption sensors
@@ -534,7 +577,7 @@ def analyze_factory_energy_consumption(factory_df):
         energy_sensors['weekday'] = energy_sensors['last_changed'].dt.dayofweek
         peak_analysis = energy_sensors.groupby(['weekday', 'hour'])['state'].apply(lambda x: x.diff().mean()).reset_index()
         peak_analysis.columns = ['weekday', 'hour', 'avg_consumption']
-        peak_analysis['day_name'] = peak_analysis['weekday'].map({0:'Mon', 1:'Tue', 2:'Wed', 3:'Thu', 4:'Fri', 5:'Sat', 6:'Sun'})
+        peak_analysis['day_name'] = WEEKDAY_LABELS[peak_analysis['weekday'].to_numpy()]
         peak_demand_analysis = peak_analysis.to_dict('records')
     
     daily_consumption_df = pd.DataFrame(daily_consumption)
@@ -571,6 +614,11 @@ def analyze_factory_energy_consumption(factory_df):
 # INVOICE/BILLING MANAGEMENT FUNCTIONS
 # ==============================================================================
 
+@st.cache_data(show_spinner=False, max_entries=16)
+def dataframe_to_csv_bytes(df):
+    """Serialise a frame to UTF-8 CSV once per distinct frame for download buttons"""
+    return df.to_csv(index=False).encode('utf-8')
+
 def create_comprehensive_billing_system():
     """Complete billing and invoice management system"""
     
@@ -773,8 +821,8 @@ def create_comprehensive_billing_system():
         </div>
         """, unsafe_allow_html=True)
         
-        # Download button for invoice
-        invoice_csv = breakdown_df.to_csv(index=False)
+        # Download button for invoice (CSV bytes cached per breakdown)
+        invoice_csv = dataframe_to_csv_bytes(breakdown_df)
         st.download_button(
             label="📥 Download Invoice (CSV)",
             data=invoice_csv,
@@ -787,6 +835,9 @@ def create_comprehensive_billing_system():
 # ENHANCED CHART FUNCTIONS
 # ==============================================================================
 
+# Longest series a line/area/scatter trace ships to the browser before it is downsampled
+MAX_CHART_POINTS = 2000
+
 def create_comprehensive_chart(df, x_col, y_col, title, color="#3b82f6", chart_type="bar", height=450):
     """Create comprehensive charts with advanced styling and interactivity"""
     
@@ -794,6 +845,18 @@ def create_comprehensive_chart(df, x_col, y_col, title, color="#3b82f6", chart_t
         st.info(f"📊 No data available for {title}")
         return
     
+    # Downsample long time series so only a few thousand points per trace reach the browser
+    if chart_type != "bar" and len(df) > MAX_CHART_POINTS and df[x_col].is_monotonic_increasing:
+        df = df.dropna(subset=[x_col, y_col])
+        x_numeric = df[x_col]
+        if pd.api.types.is_datetime64_any_dtype(x_numeric):
+            x_numeric = x_numeric.astype('int64')
+        try:
+            keep = lttb_indices(x_numeric.to_numpy(dtype=float), df[y_col].to_numpy(dtype=float), MAX_CHART_POINTS)
+            df = df.iloc[keep]
+        except (TypeError, ValueError):
+            pass
+    
     fig = go.Figure()
     
     if chart_type == "bar":
@@ -909,7 +972,7 @@ def main():
     
     # Load all data
     with st.spinner("🔄 Loading comprehensive energy data..."):
-        all_data = load_all_energy_data()
+        all_data = load_all_energy_data(local_file_signature())
     
     # Process all systems
     st.markdown("## 🔄 Processing Energy Systems...")
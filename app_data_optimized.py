@@ -9,7 +9,15 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import os
+import pyarrow as pa
+import pyarrow.parquet as pq
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+from features.data_processing import positive_diff
 
 # ==============================================================================
 # PAGE CONFIGURATION
@@ -113,15 +121,97 @@ apply_modern_design()
 # DATA LOADING FUNCTIONS
 # ==============================================================================
 
-@st.cache_data(ttl=3600, show_spinner="Loading CSV data...")
+GENERATOR_FILE = 'gen (2).csv'
+FUEL_HISTORY_FILE = 'history (5).csv'
+FACTORY_FILE = 'FACTORY ELEC.csv'
+SOLAR_FILES = [
+    'Solar_Goodwe&Fronius-Jan.csv',
+    'Solar_Goodwe&Fronius_Feb.csv', 
+    'Solar_goodwe&Fronius_April.csv',
+    'Solar_goodwe&Fronius_may.csv'
+]
+
+def file_signature(paths):
+    """Return (path, mtime, size) per file so the cache key changes only when a file does"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+def optimize_sensor_dtypes(df):
+    """Downcast sensor readings to float32 and repeated labels to category"""
+    if df.empty:
+        return df
+    
+    if 'state' in df.columns:
+        df['state'] = pd.to_numeric(df['state'], errors='coerce').astype('float32')
+    
+    for col in ['entity_id', 'source_file']:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    
+    return df
+
+# Known schema of the Home Assistant exports; non-numeric states parse straight to NaN
+SENSOR_CSV_DTYPES = {'entity_id': 'category', 'state': 'float32'}
+SENSOR_NA_VALUES = ['unavailable', 'unknown']
+
+# Stored in each Parquet sidecar's metadata so a sidecar written by an older parse is not reused;
+# bump the leading number whenever read_sensor_csv changes in a way the options above don't show
+SIDECAR_SCHEMA = repr((1, SENSOR_CSV_DTYPES, SENSOR_NA_VALUES)).encode()
+
+def read_sensor_csv(path):
+    """Parse a sensor export, reusing its Parquet sidecar when that is newer than the CSV and from the same parse"""
+    parquet_path = f"{path}.parquet"
+    try:
+        if (os.path.getmtime(parquet_path) >= os.path.getmtime(path)
+                and (pq.read_schema(parquet_path).metadata or {}).get(b'sensor_csv_schema') == SIDECAR_SCHEMA):
+            return pd.read_parquet(parquet_path)
+    except (OSError, ValueError):
+        pass
+    
+    # Arrow also parses the ISO last_changed strings to UTC timestamps in the same pass
+    df = pd.read_csv(path, engine='pyarrow', dtype=SENSOR_CSV_DTYPES, na_values=SENSOR_NA_VALUES)
+    
+    # Columnar sidecar so the next cold start skips CSV parsing; best effort on read-only disks
+    try:
+        table = pa.Table.from_pandas(df)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'sensor_csv_schema': SIDECAR_SCHEMA})
+        pq.write_table(table, parquet_path, compression='zstd')
+    except (OSError, ValueError):
+        pass
+    return df
+
+@st.cache_data(show_spinner=False, max_entries=64, persist="disk")
+def read_sensor_file(path, mtime, size):
+    """Parse one sensor CSV; cached per (path, mtime, size) so only changed files are reparsed"""
+    return read_sensor_csv(path)
+
+@st.cache_data(show_spinner=False, max_entries=64, persist="disk")
+def read_solar_file(file, mtime, size):
+    """Read a single solar CSV and tag rows with their source file"""
+    df = read_sensor_csv(file)
+    df['source_file'] = file
+    return df
+
 def load_csv_data():
+    """Load all CSV data files, reparsing only when a file has changed on disk"""
+    return load_csv_files(file_signature([GENERATOR_FILE, FUEL_HISTORY_FILE, FACTORY_FILE] + SOLAR_FILES))
+
+@st.cache_data(show_spinner="Loading CSV data...")
+def load_csv_files(signature):
     """Load all CSV data files with proper error handling"""
     
     data = {}
+    file_stats = {path: (mtime, size) for path, mtime, size in signature}
     
     try:
         # Load generator data (CSV version)
-        data['generator'] = pd.read_csv('gen (2).csv')
+        data['generator'] = read_sensor_file(GENERATOR_FILE, *file_stats[GENERATOR_FILE])
         st.success(f"✅ Generator data loaded: {len(data['generator'])} records")
     except Exception as e:
         st.error(f"❌ Error loading generator CSV: {e}")
@@ -129,7 +219,7 @@ def load_csv_data():
     
     try:
         # Load fuel level history (CSV version) 
-        data['fuel_history'] = pd.read_csv('history (5).csv')
+        data['fuel_history'] = read_sensor_file(FUEL_HISTORY_FILE, *file_stats[FUEL_HISTORY_FILE])
         st.success(f"✅ Fuel history loaded: {len(data['fuel_history'])} records")
     except Exception as e:
         st.error(f"❌ Error loading fuel history CSV: {e}")
@@ -137,33 +227,28 @@ def load_csv_data():
     
     try:
         # Load factory consumption data
-        data['factory'] = pd.read_csv('FACTORY ELEC.csv')
+        data['factory'] = read_sensor_file(FACTORY_FILE, *file_stats[FACTORY_FILE])
         st.success(f"✅ Factory data loaded: {len(data['factory'])} records")
     except Exception as e:
         st.error(f"❌ Error loading factory CSV: {e}")
         data['factory'] = pd.DataFrame()
     
-    # Load solar data from multiple CSV files
-    solar_files = [
-        'Solar_Goodwe&Fronius-Jan.csv',
-        'Solar_Goodwe&Fronius_Feb.csv', 
-        'Solar_goodwe&Fronius_April.csv',
-        'Solar_goodwe&Fronius_may.csv'
-    ]
-    
+    # Load solar data from multiple CSV files, parsing them concurrently
     solar_data_list = []
-    for file in solar_files:
-        try:
-            df = pd.read_csv(file)
-            if not df.empty:
-                df['source_file'] = file
-                solar_data_list.append(df)
-                st.success(f"✅ Solar data loaded: {file} ({len(df)} records)")
-        except Exception as e:
-            st.warning(f"⚠️ Could not load {file}: {e}")
+    with ThreadPoolExecutor(max_workers=min(8, len(SOLAR_FILES))) as executor:
+        futures = [executor.submit(read_solar_file, file, *file_stats[file]) for file in SOLAR_FILES]
+        
+        for file, future in zip(SOLAR_FILES, futures):
+            try:
+                df = future.result()
+                if not df.empty:
+                    solar_data_list.append(df)
+                    st.success(f"✅ Solar data loaded: {file} ({len(df)} records)")
+            except Exception as e:
+                st.warning(f"⚠️ Could not load {file}: {e}")
     
     if solar_data_list:
-        data['solar'] = pd.concat(solar_data_list, ignore_index=True)
+        data['solar'] = optimize_sensor_dtypes(pd.concat(solar_data_list, ignore_index=True))
         st.success(f"✅ Combined solar data: {len(data['solar'])} total records")
     else:
         data['solar'] = pd.DataFrame()
@@ -235,7 +320,7 @@ def process_generator_data(gen_df):
     
     try:
         # Convert timestamps
-        gen_df['last_changed'] = pd.to_datetime(gen_df['last_changed'])
+        gen_df['last_changed'] = pd.to_datetime(gen_df['last_changed'], format='ISO8601')
         gen_df['state'] = pd.to_numeric(gen_df['state'], errors='coerce')
         
         # Filter for fuel-related sensors
@@ -259,21 +344,16 @@ def process_generator_data(gen_df):
         if 'sensor.generator_fuel_consumed' in processed_data:
             fuel_data = processed_data['sensor.generator_fuel_consumed']
             
-            # Calculate daily consumption (difference method for cumulative data)
-            daily_summary = []
-            fuel_data['date'] = fuel_data['last_changed'].dt.date
-            
-            for date in fuel_data['date'].unique():
-                day_data = fuel_data[fuel_data['date'] == date]
-                if len(day_data) > 1:
-                    consumption = day_data['state'].max() - day_data['state'].min()
-                    daily_summary.append({
-                        'date': pd.to_datetime(date),
-                        'fuel_consumed': max(0, consumption),
-                        'readings': len(day_data)
-                    })
+            # Calculate daily consumption (difference method for cumulative data) - one grouped pass over
+            # the time-sorted readings instead of re-masking the whole frame for every date
+            daily_stats = fuel_data.groupby(fuel_data['last_changed'].dt.date, sort=False)['state'].agg(['max', 'min', 'size'])
+            daily_stats = daily_stats[daily_stats['size'] > 1]
             
-            daily_df = pd.DataFrame(daily_summary)
+            daily_df = pd.DataFrame({
+                'date': pd.to_datetime(daily_stats.index),
+                'fuel_consumed': (daily_stats['max'] - daily_stats['min']).clip(lower=0).to_numpy(dtype='float64'),
+                'readings': daily_stats['size'].to_numpy()
+            }) if not daily_stats.empty else pd.DataFrame()
             
             # Add cost calculations (default price)
             if not daily_df.empty:
@@ -301,7 +381,7 @@ def process_fuel_history_data(fuel_df):
     
     try:
         # Convert timestamps
-        fuel_df['last_changed'] = pd.to_datetime(fuel_df['last_changed'])
+        fuel_df['last_changed'] = pd.to_datetime(fuel_df['last_changed'], format='ISO8601')
         fuel_df['state'] = pd.to_numeric(fuel_df['state'], errors='coerce')
         
         # Focus on fuel level sensors
@@ -312,7 +392,7 @@ def process_fuel_history_data(fuel_df):
             level_sensors = level_sensors.sort_values('last_changed')
             
             # Calculate fuel usage from level changes
-            level_sensors['fuel_used'] = -level_sensors['state'].diff().clip(lower=0)
+            level_sensors['fuel_used'] = -positive_diff(level_sensors['state'].to_numpy(dtype=float))
             
             # Group by date
             daily_usage = level_sensors.groupby(level_sensors['last_changed'].dt.date).agg({
@@ -337,7 +417,7 @@ def process_solar_data(solar_df):
     
     try:
         # Convert timestamps
-        solar_df['last_changed'] = pd.to_datetime(solar_df['last_changed'])
+        solar_df['last_changed'] = pd.to_datetime(solar_df['last_changed'], format='ISO8601')
         
         # Find power-related sensors
         power_sensors = solar_df[solar_df['entity_id'].str.contains('power|kw', case=False, na=False)]
@@ -346,24 +426,22 @@ def process_solar_data(solar_df):
             # Convert power values to numeric (handle units)
             power_sensors['state'] = pd.to_numeric(power_sensors['state'], errors='coerce')
             
-            # Group by timestamp and sum all inverters
+            # Hourly mean per sensor as a wide frame (one column per inverter sensor)
             hourly_power = power_sensors.groupby([
-                power_sensors['last_changed'].dt.floor('H'),
-                power_sensors['entity_id']
-            ])['state'].mean().reset_index()
-            
-            # Calculate total system power
-            system_power = hourly_power.groupby('last_changed')['state'].sum().reset_index()
-            system_power.columns = ['timestamp', 'total_power_kw']
+                power_sensors['last_changed'].dt.floor('h'),
+                power_sensors['entity_id'].astype('category')
+            ], observed=True)['state'].mean().unstack('entity_id')
+
+            # Calculate total system power by summing across sensors (stays on the hourly DatetimeIndex)
+            system_power = hourly_power.sum(axis=1)
             
-            # Daily summaries
-            system_power['date'] = system_power['timestamp'].dt.date
-            daily_solar = system_power.groupby('date').agg({
-                'total_power_kw': ['sum', 'max', 'mean']
-            }).reset_index()
+            # Daily summaries - group on the normalised index rather than a materialised date column
+            hourly_index = system_power.index
+            if hourly_index.tz is not None:
+                hourly_index = hourly_index.tz_localize(None)
+            daily_solar = system_power.groupby(hourly_index.normalize().rename('date')).agg(['sum', 'max', 'mean']).reset_index()
             
             daily_solar.columns = ['date', 'total_kwh', 'peak_kw', 'avg_kw']
-            daily_solar['date'] = pd.to_datetime(daily_solar['date'])
             
             summary_stats = {
                 'total_generation': daily_solar['total_kwh'].sum(),
@@ -386,18 +464,21 @@ def process_factory_data(factory_df):
     
     try:
         # Convert timestamps
-        factory_df['last_changed'] = pd.to_datetime(factory_df['last_changed'])
+        factory_df['last_changed'] = pd.to_datetime(factory_df['last_changed'], format='ISO8601')
         factory_df['state'] = pd.to_numeric(factory_df['state'], errors='coerce')
         
         # Find kWh consumption sensors
         kwh_sensors = factory_df[factory_df['entity_id'].str.contains('kwh|consumption', case=False, na=False)]
         
         if not kwh_sensors.empty:
-            # Sort by time
-            kwh_sensors = kwh_sensors.sort_values('last_changed')
+            # Sort by sensor, then time, so each sensor's readings form one contiguous run
+            kwh_sensors = kwh_sensors.sort_values(['entity_id', 'last_changed'])
             
-            # Calculate daily consumption from cumulative readings
-            kwh_sensors['daily_kwh'] = kwh_sensors.groupby('entity_id')['state'].diff().clip(lower=0)
+            # Calculate daily consumption from cumulative readings, restarting at each sensor's first reading
+            daily_kwh = positive_diff(kwh_sensors['state'].to_numpy(dtype=float))
+            sensor_ids = kwh_sensors['entity_id'].to_numpy()
+            daily_kwh[1:][sensor_ids[1:] != sensor_ids[:-1]] = 0
+            kwh_sensors['daily_kwh'] = daily_kwh
             
             # Group by date
             daily_consumption = kwh_sensors.groupby(kwh_sensors['last_changed'].dt.date).agg({
@@ -419,16 +500,60 @@ def process_factory_data(factory_df):
 # ENHANCED VISUALIZATION FUNCTIONS  
 # ==============================================================================
 
-def create_modern_chart(df, x_col, y_col, title, color="#3b82f6", chart_type="bar"):
-    """Create modern interactive charts"""
+# Line/area series longer than this are drawn as a min/max band around a mean line
+BAND_THRESHOLD_POINTS = 5000
+BAND_BINS = 2000
+
+def aggregate_band(df, x_col, y_col, n_bins=BAND_BINS):
+    """Min, mean and max of y_col over equal-width x bins, labelled by each bin's first x"""
+    x_numeric = df[x_col]
+    if pd.api.types.is_datetime64_any_dtype(x_numeric):
+        x_numeric = x_numeric.astype('int64')
+    x_values = x_numeric.to_numpy(dtype=float)
     
-    if df.empty:
-        st.info(f"📊 No data available for {title}")
-        return
+    lo, hi = x_values.min(), x_values.max()
+    bins = np.minimum(((x_values - lo) / max(hi - lo, 1) * n_bins).astype(np.int64), n_bins - 1)
+    
+    band = df[y_col].groupby(bins).agg(['min', 'mean', 'max'])
+    band['x'] = df[x_col].groupby(bins).first()
+    return band
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_modern_figure(df, x_col, y_col, title, color="#3b82f6", chart_type="bar"):
+    """Build the Plotly figure for a chart, cached per data and style"""
     
     fig = go.Figure()
     
-    if chart_type == "bar":
+    if chart_type in ("line", "area") and len(df) > BAND_THRESHOLD_POINTS:
+        # Long ranges: translucent min/max silhouette plus the mean, one point per bin
+        band = aggregate_band(df.dropna(subset=[x_col, y_col]), x_col, y_col)
+        band_fill = f"rgba({int(color[1:3], 16)}, {int(color[3:5], 16)}, {int(color[5:7], 16)}, 0.25)"
+        fig.add_trace(go.Scattergl(
+            x=band['x'],
+            y=band['min'],
+            mode='lines',
+            line=dict(width=0),
+            hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scattergl(
+            x=band['x'],
+            y=band['max'],
+            mode='lines',
+            fill='tonexty',
+            fillcolor=band_fill,
+            line=dict(width=0),
+            hoverinfo='skip'
+        ))
+        # Area charts keep their fill to zero under the mean, as they have at shorter ranges
+        fig.add_trace(go.Scattergl(
+            x=band['x'],
+            y=band['mean'],
+            mode='lines',
+            fill='tozeroy' if chart_type == "area" else 'none',
+            line=dict(color=color, width=2),
+            hovertemplate="<b>%{x}</b><br>%{y}<extra></extra>"
+        ))
+    elif chart_type == "bar":
         fig.add_trace(go.Bar(
             x=df[x_col],
             y=df[y_col],
@@ -475,6 +600,16 @@ def create_modern_chart(df, x_col, y_col, title, color="#3b82f6", chart_type="ba
         )
     )
     
+    return fig
+
+def create_modern_chart(df, x_col, y_col, title, color="#3b82f6", chart_type="bar"):
+    """Create modern interactive charts"""
+    
+    if df.empty:
+        st.info(f"📊 No data available for {title}")
+        return
+    
+    fig = build_modern_figure(df, x_col, y_col, title, color, chart_type)
     st.plotly_chart(fig, use_container_width=True)
 
 # Process all data
@@ -566,7 +701,7 @@ with tab1:
         # Show available data structure for debugging
         if not all_data.get('generator', pd.DataFrame()).empty:
             with st.expander("🔍 Debug: Available Generator Sensors"):
-                st.write(all_data['generator']['entity_id'].unique())
+                st.write(all_data['generator']['entity_id'].astype(str).unique())
 
 # Solar Tab  
 with tab2:
@@ -622,7 +757,7 @@ with tab2:
         
         if not all_data.get('solar', pd.DataFrame()).empty:
             with st.expander("🔍 Debug: Available Solar Sensors"):
-                st.write(all_data['solar']['entity_id'].unique())
+                st.write(all_data['solar']['entity_id'].astype(str).unique())
 
 # Factory Tab
 with tab3:
@@ -672,7 +807,7 @@ with tab3:
         
         if not all_data.get('factory', pd.DataFrame()).empty:
             with st.expander("🔍 Debug: Available Factory Sensors"):
-                st.write(all_data['factory']['entity_id'].unique())
+                st.write(all_data['factory']['entity_id'].astype(str).unique())
 
 # Invoice Tab
 with tab4:
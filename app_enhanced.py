@@ -292,9 +292,12 @@ def main():
     st.markdown("---")
     
     # Load data (using functions from app_fixed.py)
-    solar_df, gen_df, fuel_level_df, factory_df = load_all_data()
-    fuel_purchases_df = load_fuel_purchase_data()
-    daily_generator, generator_totals = process_generator_data(gen_df, fuel_level_df, fuel_purchases_df)
+    solar_df, gen_df, fuel_level_df, factory_df, fuel_purchases_df = load_all_data()
+    generator_source_key = tuple(
+        source_version(DATA_SOURCES[name], df)
+        for name, df in (("generator", gen_df), ("fuel_level", fuel_level_df), ("fuel_purchase", fuel_purchases_df))
+    )
+    daily_generator, generator_totals = process_generator_data(generator_source_key, gen_df, fuel_level_df, fuel_purchases_df)
     
     # Initialize analytics if available
     if ADVANCED_FEATURES:
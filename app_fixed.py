@@ -8,15 +8,29 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
+from plotly.subplots import make_subplots
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import io
+import os
 import openpyxl
 from datetime import datetime, timedelta
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from pandas.api.types import union_categoricals
 import logging
 from typing import Tuple, Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
 import warnings
 warnings.filterwarnings('ignore')
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+from features.data_processing import lttb_indices, positive_diff, slice_date_range, sort_by_timestamp
+from features.invoices import read_invoice_cells, update_invoice_cells
+from features.snapshots import content_version, normalize_excel_frame, read_snapshot, save_snapshot, snapshot_headers
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -295,6 +309,203 @@ def render_enhanced_metric(
         </div>
     """, unsafe_allow_html=True)
 
+# Line/area traces longer than this are downsampled before plotting
+MAX_CHART_POINTS = 5000
+
+# Chart layout pieces that never change between renders, built once at import
+CHART_TITLE_FONT = dict(size=20, color="#f7fafc", family="Inter")
+CHART_AXIS_FONT = dict(color="#a0aec0")
+CHART_XAXIS_BASE = dict(
+    showgrid=False, 
+    linecolor="#2d3748", 
+    zeroline=False,
+    tickfont=CHART_AXIS_FONT
+)
+CHART_YAXIS_BASE = dict(
+    showgrid=True, 
+    gridcolor="rgba(255,255,255,0.05)", 
+    linecolor="#2d3748",
+    zeroline=False,
+    tickfont=CHART_AXIS_FONT
+)
+CHART_LAYOUT_BASE = dict(
+    paper_bgcolor='rgba(0,0,0,0)',
+    plot_bgcolor='rgba(0,0,0,0)',
+    font=dict(family="Inter", color="#a0aec0", size=12),
+    hovermode="x unified",
+    margin=dict(l=70, r=30, t=80, b=70),
+    showlegend=False,
+    hoverlabel=dict(
+        bgcolor="rgba(37, 42, 58, 0.95)",
+        bordercolor="rgba(255,255,255,0.1)",
+        font=dict(color="#f7fafc", family="Inter", size=12)
+    )
+)
+CHART_CONFIG_BASE = {
+    'displayModeBar': True,
+    'modeBarButtonsToRemove': ['lasso2d', 'select2d', 'autoScale2d', 'pan2d'],
+    'displaylogo': False
+}
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_enhanced_figure(
+    df_clean: pd.DataFrame, 
+    x_col: str, 
+    y_col: str, 
+    title: str, 
+    color: str, 
+    kind: str, 
+    y_label: str,
+    height: int
+) -> go.Figure:
+    """Build the Plotly figure for a cleaned frame, cached per data and style"""
+    
+    # Downsample long time series so the browser only receives what it can draw
+    if kind != 'bar' and len(df_clean) > MAX_CHART_POINTS and df_clean[x_col].is_monotonic_increasing:
+        x_numeric = df_clean[x_col]
+        if pd.api.types.is_datetime64_any_dtype(x_numeric):
+            x_numeric = x_numeric.astype('int64')
+        keep = lttb_indices(
+            x_numeric.to_numpy(dtype=float),
+            df_clean[y_col].to_numpy(dtype=float),
+            MAX_CHART_POINTS
+        )
+        df_clean = df_clean.iloc[keep]
+    
+    # Hand Plotly plain NumPy arrays so it can take its fast typed-array encoding path
+    x_values = df_clean[x_col].to_numpy()
+    y_values = df_clean[y_col].to_numpy(dtype=float)
+    
+    # Create trace (line/area render through WebGL rather than one SVG node per point)
+    if kind == 'bar':
+        trace = go.Bar(
+            x=x_values, 
+            y=y_values, 
+            marker=dict(
+                color=color,
+                line=dict(width=0)
+            ),
+            name=y_label,
+            hovertemplate="<b>%{x}</b><br>%{y}<extra></extra>"
+        )
+    elif kind == 'line':
+        trace = go.Scattergl(
+            x=x_values, 
+            y=y_values, 
+            mode='lines+markers', 
+            line=dict(color=color, width=3),
+            marker=dict(size=8, color=color, line=dict(width=2, color='white')),
+            name=y_label,
+            hovertemplate="<b>%{x}</b><br>%{y}<extra></extra>"
+        )
+    elif kind == 'area':
+        trace = go.Scattergl(
+            x=x_values, 
+            y=y_values, 
+            fill='tozeroy', 
+            mode='lines', 
+            line=dict(color=color, width=2),
+            fillcolor=f"rgba({int(color[1:3], 16)}, {int(color[3:5], 16)}, {int(color[5:7], 16)}, 0.3)",
+            name=y_label,
+            hovertemplate="<b>%{x}</b><br>%{y}<extra></extra>"
+        )
+    else:
+        raise ValueError(f"Unsupported chart type: {kind}")
+    
+    # Enhanced layout
+    layout = go.Layout(
+        title=dict(
+            text=f"<b>{title}</b>",
+            font=CHART_TITLE_FONT,
+            x=0.02,
+            y=0.95
+        ),
+        height=height,
+        xaxis=dict(
+            **CHART_XAXIS_BASE,
+            title=dict(text=x_col.replace('_', ' ').title(), font=CHART_AXIS_FONT)
+        ),
+        yaxis=dict(
+            **CHART_YAXIS_BASE,
+            title=dict(text=y_label, font=CHART_AXIS_FONT)
+        ),
+        **CHART_LAYOUT_BASE
+    )
+    
+    return go.Figure(data=[trace], layout=layout)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_stacked_bar_figure(
+    df_clean: pd.DataFrame, 
+    x_col: str, 
+    series: Tuple[Tuple[str, str, str], ...], 
+    title: str, 
+    height: int
+) -> go.Figure:
+    """Build one figure with a bar subplot per (column, label, color) series on a shared x-axis"""
+    fig = make_subplots(
+        rows=len(series), cols=1, shared_xaxes=True, vertical_spacing=0.08,
+        subplot_titles=[label for _, label, _ in series]
+    )
+    x_values = df_clean[x_col].to_numpy()
+    
+    for row, (y_col, label, color) in enumerate(series, start=1):
+        fig.add_trace(go.Bar(
+            x=x_values, 
+            y=df_clean[y_col].to_numpy(dtype=float), 
+            marker=dict(color=color, line=dict(width=0)),
+            name=label,
+            hovertemplate="<b>%{x}</b><br>%{y}<extra></extra>"
+        ), row=row, col=1)
+        fig.update_yaxes(CHART_YAXIS_BASE, title=dict(text=label, font=CHART_AXIS_FONT), row=row, col=1)
+    
+    fig.update_xaxes(CHART_XAXIS_BASE)
+    fig.update_xaxes(title=dict(text=x_col.replace('_', ' ').title(), font=CHART_AXIS_FONT), row=len(series), col=1)
+    fig.update_annotations(font=CHART_AXIS_FONT)
+    fig.update_layout(
+        title=dict(text=f"<b>{title}</b>", font=CHART_TITLE_FONT, x=0.02, y=0.97),
+        height=height,
+        **CHART_LAYOUT_BASE
+    )
+    return fig
+
+def create_stacked_bar_chart(
+    df: pd.DataFrame, 
+    x_col: str, 
+    series: Tuple[Tuple[str, str, str], ...], 
+    title: str, 
+    height: int = 600
+) -> None:
+    """Render several bar series over the same x values as one figure instead of one chart each"""
+    
+    if df.empty:
+        st.info("📊 No data available for this visualization.")
+        return
+    
+    missing_columns = {x_col, *(y_col for y_col, _, _ in series)}.difference(df.columns)
+    if missing_columns:
+        st.error(f"❌ Missing columns: {', '.join(sorted(missing_columns))}")
+        logger.error(f"Missing columns in dataframe. Available: {list(df.columns)}")
+        return
+    
+    try:
+        fig = build_stacked_bar_figure(df, x_col, series, title, height)
+        config = {
+            **CHART_CONFIG_BASE,
+            'toImageButtonOptions': {
+                'format': 'png',
+                'filename': title.lower().replace(" ", "_"),
+                'height': height,
+                'width': 1400,
+                'scale': 2
+            }
+        }
+        st.plotly_chart(fig, use_container_width=True, config=config)
+    
+    except Exception as e:
+        st.error(f"❌ Error creating chart: {str(e)}")
+        logger.error(f"Chart creation failed: {e}")
+
 def create_enhanced_chart(
     df: pd.DataFrame, 
     x_col: str, 
@@ -312,99 +523,24 @@ def create_enhanced_chart(
         return
     
     # Validate columns
-    if x_col not in df.columns or y_col not in df.columns:
-        st.error(f"❌ Missing columns: {x_col} or {y_col}")
+    missing_columns = {x_col, y_col}.difference(df.columns)
+    if missing_columns:
+        st.error(f"❌ Missing columns: {', '.join(sorted(missing_columns))}")
         logger.error(f"Missing columns in dataframe. Available: {list(df.columns)}")
         return
     
     # Clean data
-    df_clean = df.dropna(subset=[x_col, y_col]).copy()
+    df_clean = df.dropna(subset=[x_col, y_col])
     
     if df_clean.empty:
         st.warning("⚠️ No valid data points after cleaning.")
         return
     
     try:
-        # Create trace
-        if kind == 'bar':
-            trace = go.Bar(
-                x=df_clean[x_col], 
-                y=df_clean[y_col], 
-                marker=dict(
-                    color=color,
-                    line=dict(width=0)
-                ),
-                name=y_label,
-                hovertemplate="<b>%{x}</b><br>%{y}<extra></extra>"
-            )
-        elif kind == 'line':
-            trace = go.Scatter(
-                x=df_clean[x_col], 
-                y=df_clean[y_col], 
-                mode='lines+markers', 
-                line=dict(color=color, width=3),
-                marker=dict(size=8, color=color, line=dict(width=2, color='white')),
-                name=y_label,
-                hovertemplate="<b>%{x}</b><br>%{y}<extra></extra>"
-            )
-        elif kind == 'area':
-            trace = go.Scatter(
-                x=df_clean[x_col], 
-                y=df_clean[y_col], 
-                fill='tozeroy', 
-                mode='lines', 
-                line=dict(color=color, width=2),
-                fillcolor=f"rgba({int(color[1:3], 16)}, {int(color[3:5], 16)}, {int(color[5:7], 16)}, 0.3)",
-                name=y_label,
-                hovertemplate="<b>%{x}</b><br>%{y}<extra></extra>"
-            )
-        else:
-            st.error(f"❌ Unsupported chart type: {kind}")
-            return
-        
-        # Enhanced layout
-        layout = go.Layout(
-            title=dict(
-                text=f"<b>{title}</b>",
-                font=dict(size=20, color="#f7fafc", family="Inter"),
-                x=0.02,
-                y=0.95
-            ),
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font=dict(family="Inter", color="#a0aec0", size=12),
-            height=height,
-            hovermode="x unified",
-            xaxis=dict(
-                showgrid=False, 
-                linecolor="#2d3748", 
-                zeroline=False,
-                tickfont=dict(color="#a0aec0"),
-                title=dict(text=x_col.replace('_', ' ').title(), font=dict(color="#a0aec0"))
-            ),
-            yaxis=dict(
-                showgrid=True, 
-                gridcolor="rgba(255,255,255,0.05)", 
-                linecolor="#2d3748",
-                zeroline=False,
-                tickfont=dict(color="#a0aec0"),
-                title=dict(text=y_label, font=dict(color="#a0aec0"))
-            ),
-            margin=dict(l=70, r=30, t=80, b=70),
-            showlegend=False,
-            hoverlabel=dict(
-                bgcolor="rgba(37, 42, 58, 0.95)",
-                bordercolor="rgba(255,255,255,0.1)",
-                font=dict(color="#f7fafc", family="Inter", size=12)
-            )
-        )
-        
-        fig = go.Figure(data=[trace], layout=layout)
+        fig = build_enhanced_figure(df_clean, x_col, y_col, title, color, kind, y_label, height)
         
         config = {
-            'displayModeBar': True,
-            'modeBarButtonsToRemove': ['lasso2d', 'select2d', 'autoScale2d', 'pan2d'],
-            'displaylogo': False,
+            **CHART_CONFIG_BASE,
             'toImageButtonOptions': {
                 'format': 'png',
                 'filename': title.lower().replace(" ", "_"),
@@ -444,10 +580,32 @@ SOLAR_DATA_SOURCES = [
     ("May", "https://raw.githubusercontent.com/Saint-Akim/Solar-performance/main/Solar_goodwe&Fronius_may.csv")
 ]
 
-def safe_request(url: str, timeout: int = 30) -> Optional[requests.Response]:
-    """Make safe HTTP requests with proper error handling"""
+# Columns every Home Assistant sensor export must provide
+REQUIRED_SENSOR_COLUMNS = frozenset({'state', 'last_changed'})
+
+# Typed parse for Home Assistant exports: numeric states and dictionary-encoded sensor names
+# straight from Arrow's multi-threaded CSV reader, with the two non-numeric states read as missing
+SENSOR_CSV_CONVERT_OPTIONS = pa_csv.ConvertOptions(
+    column_types={'state': pa.float32(), 'entity_id': pa.dictionary(pa.int32(), pa.string())},
+    null_values=['', 'unavailable', 'unknown'],
+    strings_can_be_null=True
+)
+
+# One pooled session for every download: the GitHub raw files share a host, so reruns reuse
+# open TCP/TLS connections instead of paying a fresh handshake per file, and transient
+# connection failures are retried with a short backoff
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=Retry(total=2, backoff_factor=0.3)))
+
+def safe_request(
+    url: str, 
+    timeout: int = 30, 
+    headers: Optional[Dict[str, str]] = None, 
+    pending: Optional[Future] = None
+) -> Optional[requests.Response]:
+    """Make safe HTTP requests with proper error handling (or resolve one already in flight)"""
     try:
-        response = requests.get(url, timeout=timeout)
+        response = pending.result() if pending is not None else HTTP_SESSION.get(url, timeout=timeout, headers=headers)
         response.raise_for_status()
         return response
     except requests.exceptions.Timeout:
@@ -461,33 +619,69 @@ def safe_request(url: str, timeout: int = 30) -> Optional[requests.Response]:
         logger.error(f"Request failed for {url}: {e}")
     return None
 
-def load_excel_data(url: str) -> pd.DataFrame:
-    """Load Excel data with enhanced error handling"""
-    response = safe_request(url)
+def load_excel_data(url: str, pending: Optional[Future] = None) -> pd.DataFrame:
+    """Load Excel data with enhanced error handling, reusing the local snapshot while unchanged"""
+    response = safe_request(url, headers=snapshot_headers(url), pending=pending)
     if response is None:
         return pd.DataFrame()
     
+    if response.status_code == 304:
+        df = read_snapshot(url)
+        if df is not None:
+            return df
+        response = safe_request(url)
+        if response is None:
+            return pd.DataFrame()
+    
     try:
-        df = pd.read_excel(io.BytesIO(response.content))
+        df = normalize_excel_frame(pd.read_excel(io.BytesIO(response.content)))
+        df.attrs['source_version'] = content_version(response.headers.get('ETag'), response.content)
         logger.info(f"Loaded Excel: {len(df)} rows from {url}")
+        save_snapshot(url, df, response.headers.get('ETag'))
         return df
     except Exception as e:
         st.error(f"📊 Error reading Excel file: {str(e)}")
         logger.error(f"Excel parsing failed: {e}")
         return pd.DataFrame()
 
-def load_csv_data(url: str) -> pd.DataFrame:
-    """Load CSV data with multiple encoding fallbacks"""
-    response = safe_request(url)
+def source_version(url: str, df: pd.DataFrame) -> Tuple:
+    """Cheap cache key for a loaded remote file: the ETag or content hash of the download it was parsed from"""
+    return (url, df.attrs.get('source_version'))
+
+def parse_sensor_csv(content: bytes, encoding: str) -> pd.DataFrame:
+    """Parse a sensor export with Arrow's threaded reader, falling back to pandas inference if it does not fit the schema"""
+    try:
+        table = pa_csv.read_csv(
+            io.BytesIO(content),
+            read_options=pa_csv.ReadOptions(use_threads=True, encoding=encoding),
+            convert_options=SENSOR_CSV_CONVERT_OPTIONS
+        )
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    except pa.ArrowInvalid:
+        return pd.read_csv(io.BytesIO(content), encoding=encoding)
+
+def load_csv_data(url: str, pending: Optional[Future] = None) -> pd.DataFrame:
+    """Load CSV data with multiple encoding fallbacks, reusing the local snapshot while unchanged"""
+    response = safe_request(url, headers=snapshot_headers(url), pending=pending)
     if response is None:
         return pd.DataFrame()
     
+    if response.status_code == 304:
+        df = read_snapshot(url)
+        if df is not None:
+            return df
+        response = safe_request(url)
+        if response is None:
+            return pd.DataFrame()
+    
     encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
     
     for encoding in encodings:
         try:
-            df = pd.read_csv(io.StringIO(response.content.decode(encoding)))
+            df = parse_sensor_csv(response.content, encoding)
+            df.attrs['source_version'] = content_version(response.headers.get('ETag'), response.content)
             logger.info(f"Loaded CSV: {len(df)} rows from {url} ({encoding})")
+            save_snapshot(url, df, response.headers.get('ETag'))
             return df
         except UnicodeDecodeError:
             continue
@@ -498,36 +692,93 @@ def load_csv_data(url: str) -> pd.DataFrame:
     st.error(f"📊 Could not decode CSV file from: {url}")
     return pd.DataFrame()
 
+def concat_sensor_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Stack per-file sensor exports, unifying entity_id categories so the column stays dictionary-encoded"""
+    if all('entity_id' in df.columns and isinstance(df['entity_id'].dtype, pd.CategoricalDtype) for df in frames):
+        categories = union_categoricals([df['entity_id'] for df in frames]).categories
+        frames = [df.assign(entity_id=df['entity_id'].cat.set_categories(categories)) for df in frames]
+    return pd.concat(frames, ignore_index=True, sort=False)
+
+# Inverter grid power in W. Home Assistant reports power fed into the grid as negative, so the loader
+# flips the sign: the solar tab expects kW with production positive (small negatives are night-time draw)
+GRID_POWER_SENSORS = ['sensor.fronius_grid_power', 'sensor.goodwe_grid_power']
+
+def pivot_solar_readings(solar_df: pd.DataFrame) -> pd.DataFrame:
+    """Pivot long-format inverter readings to one column per sensor and add the combined grid power"""
+    if solar_df.empty or not {'entity_id', 'state', 'last_changed'}.issubset(solar_df.columns):
+        return solar_df
+    
+    # Same columns pivot_table produced, built with groupby/unstack over the categorical sensor names;
+    # unparseable states are dropped first, as pivot_table's mean skipped them
+    readings = pd.DataFrame({
+        'last_changed': solar_df['last_changed'],
+        'entity_id': solar_df['entity_id'].astype('category'),
+        'state': pd.to_numeric(solar_df['state'], errors='coerce').astype('float32')
+    }).dropna(subset=['state'])
+    
+    solar_pivot = readings.groupby(['last_changed', 'entity_id'], observed=True)['state'].mean().unstack('entity_id')
+    solar_pivot.columns = solar_pivot.columns.astype(str)
+    solar_pivot.columns.name = None
+    
+    # Inverter output in kW (production positive) plus the combined total, computed once here so reruns
+    # just read the columns; a month where only one inverter reported uses the same convention
+    grid_sensors = [sensor for sensor in GRID_POWER_SENSORS if sensor in solar_pivot.columns]
+    if grid_sensors:
+        grid_power_kw = solar_pivot[grid_sensors].to_numpy(dtype=np.float32) / np.float32(-1000)
+        solar_pivot[grid_sensors] = grid_power_kw
+        # NaN counts as zero; nansum over the float32 block avoids the fillna/sum temporaries
+        solar_pivot['sum_grid_power'] = np.nansum(grid_power_kw, axis=1)
+    
+    return solar_pivot.reset_index()
+
 @st.cache_data(ttl=3600, show_spinner="🔄 Loading energy data...")
-def load_all_data() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+def load_all_data() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """Load all data sources with progress indication"""
     
     # Load primary data sources
     progress_bar = st.progress(0)
     status_text = st.empty()
     
-    status_text.text("Loading generator data...")
-    gen_df = load_excel_data(DATA_SOURCES["generator"])
-    progress_bar.progress(20)
-    
-    status_text.text("Loading fuel level data...")
-    fuel_level_df = load_excel_data(DATA_SOURCES["fuel_level"])
-    progress_bar.progress(40)
-    
-    status_text.text("Loading factory consumption data...")
-    factory_df = load_csv_data(DATA_SOURCES["factory"])
-    progress_bar.progress(60)
-    
-    status_text.text("Loading solar performance data...")
-    solar_dfs = []
-    for i, (month, url) in enumerate(SOLAR_DATA_SOURCES):
-        df = load_csv_data(url)
-        if not df.empty:
-            df['month'] = month
-            solar_dfs.append(df)
-        progress_bar.progress(60 + (i + 1) * 8)
+    # Every download starts at once on worker threads sharing the pooled session, so a cold load
+    # waits about as long as the slowest file; responses are checked and parsed here, in order,
+    # so any warnings still render from the script thread
+    primary_urls = [DATA_SOURCES["generator"], DATA_SOURCES["fuel_level"], DATA_SOURCES["factory"], DATA_SOURCES["fuel_purchase"]]
+    solar_urls = [url for _, url in SOLAR_DATA_SOURCES]
+    with ThreadPoolExecutor(max_workers=len(primary_urls) + len(solar_urls)) as executor:
+        gen_future, fuel_level_future, factory_future, fuel_purchase_future = [
+            executor.submit(HTTP_SESSION.get, url, timeout=30, headers=snapshot_headers(url))
+            for url in primary_urls
+        ]
+        solar_futures = [
+            executor.submit(HTTP_SESSION.get, url, timeout=30, headers=snapshot_headers(url))
+            for url in solar_urls
+        ]
+        
+        status_text.text("Loading generator data...")
+        gen_df = load_excel_data(DATA_SOURCES["generator"], pending=gen_future)
+        progress_bar.progress(20)
+        
+        status_text.text("Loading fuel level data...")
+        fuel_level_df = load_excel_data(DATA_SOURCES["fuel_level"], pending=fuel_level_future)
+        progress_bar.progress(40)
+        
+        status_text.text("Loading factory consumption data...")
+        factory_df = sort_by_timestamp(load_csv_data(DATA_SOURCES["factory"], pending=factory_future), utc=True)
+        progress_bar.progress(60)
+        
+        status_text.text("Loading solar performance data...")
+        solar_dfs = []
+        for i, ((month, url), future) in enumerate(zip(SOLAR_DATA_SOURCES, solar_futures)):
+            df = load_csv_data(url, pending=future)
+            if not df.empty:
+                df['month'] = month
+                solar_dfs.append(df)
+            progress_bar.progress(60 + (i + 1) * 7)
+        
+        status_text.text("Loading fuel purchase data...")
+        fuel_purchases_df = load_fuel_purchase_data(pending=fuel_purchase_future)
     
-    solar_df = pd.concat(solar_dfs, ignore_index=True) if solar_dfs else pd.DataFrame()
+    solar_df = pivot_solar_readings(sort_by_timestamp(concat_sensor_frames(solar_dfs), utc=True)) if solar_dfs else pd.DataFrame()
     
     status_text.text("Data loading complete!")
     progress_bar.progress(100)
@@ -538,14 +789,24 @@ def load_all_data() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFr
     
     # Log summary
     logger.info(f"Data loading summary - Solar: {len(solar_df)}, Gen: {len(gen_df)}, "
-                f"Fuel: {len(fuel_level_df)}, Factory: {len(factory_df)}")
+                f"Fuel: {len(fuel_level_df)}, Factory: {len(factory_df)}, Purchases: {len(fuel_purchases_df)}")
     
-    return solar_df, gen_df, fuel_level_df, factory_df
+    return solar_df, gen_df, fuel_level_df, factory_df, fuel_purchases_df
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_billing_template(url: str) -> Optional[bytes]:
+    """Raw bytes of the invoice workbook, downloaded once per hour rather than on every rerun"""
+    response = safe_request(url)
+    return response.content if response is not None else None
 
-@st.cache_data(ttl=1800)
-def load_fuel_purchase_data() -> pd.DataFrame:
+@st.cache_data(show_spinner=False, max_entries=4)
+def read_invoice_fields(template: bytes) -> Tuple:
+    """Current values of the editable invoice cells, parsed once per template"""
+    return read_invoice_cells(template)
+
+def load_fuel_purchase_data(pending: Optional[Future] = None) -> pd.DataFrame:
     """Load fuel purchase data with data cleaning"""
-    df = load_excel_data(DATA_SOURCES["fuel_purchase"])
+    df = load_excel_data(DATA_SOURCES["fuel_purchase"], pending=pending)
     
     if df.empty:
         return pd.DataFrame()
@@ -556,17 +817,16 @@ def load_fuel_purchase_data() -> pd.DataFrame:
         
         # Parse dates with multiple format support
         date_columns = [col for col in df.columns if 'date' in col]
-        for col in date_columns:
-            df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
+        if date_columns:
+            df[date_columns] = df[date_columns].apply(pd.to_datetime, errors='coerce', dayfirst=True)
         
-        # Clean price data
+        # Clean price data in one bulk assignment
         price_columns = [col for col in df.columns if 'price' in col or 'cost' in col]
-        for col in price_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        if price_columns:
+            df[price_columns] = df[price_columns].apply(pd.to_numeric, errors='coerce')
         
         # Remove rows with missing critical data
-        df = df.dropna(subset=[col for col in ['date', 'price_per_litre'] if col in df.columns])
+        df = df.dropna(subset=df.columns.intersection(['date', 'price_per_litre']))
         
         logger.info(f"Cleaned fuel purchase data: {len(df)} records")
         return df
@@ -577,8 +837,7 @@ def load_fuel_purchase_data() -> pd.DataFrame:
         return pd.DataFrame()
 
 # Load all data
-solar_df, gen_df, fuel_level_df, factory_df = load_all_data()
-fuel_purchases_df = load_fuel_purchase_data()
+solar_df, gen_df, fuel_level_df, factory_df, fuel_purchases_df = load_all_data()
 
 # ==============================================================================
 # 3. ENHANCED GENERATOR DATA PROCESSING
@@ -590,40 +849,47 @@ def process_timezone_data(df: pd.DataFrame, timestamp_col: str = 'last_changed')
         return df
     
     try:
-        # Convert to datetime with UTC assumption, then to South African time
-        df[timestamp_col] = pd.to_datetime(df[timestamp_col], errors='coerce', utc=True)
-        df[timestamp_col] = df[timestamp_col].dt.tz_convert('Africa/Johannesburg')
-        df[timestamp_col] = df[timestamp_col].dt.tz_localize(None)  # Remove timezone info
+        # Parse ISO strings straight to UTC (skipped if the loader already did), then
+        # shift to South African wall-clock time and drop the tz in one expression
+        timestamps = df[timestamp_col]
+        if not isinstance(timestamps.dtype, pd.DatetimeTZDtype):
+            timestamps = pd.to_datetime(timestamps, errors='coerce', utc=True, format='ISO8601')
+        df[timestamp_col] = timestamps.dt.tz_convert('Africa/Johannesburg').dt.tz_localize(None)
         return df.dropna(subset=[timestamp_col])
     except Exception as e:
         logger.error(f"Timezone processing failed: {e}")
         return df
 
 @st.cache_data
-def process_generator_data(gen_df: pd.DataFrame, fuel_level_df: pd.DataFrame, fuel_purchases_df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, float]]:
-    """Enhanced generator data processing with better error handling"""
+def process_generator_data(
+    source_key: Tuple, 
+    _gen_df: pd.DataFrame, 
+    _fuel_level_df: pd.DataFrame, 
+    _fuel_purchases_df: pd.DataFrame
+) -> Tuple[pd.DataFrame, Dict[str, float]]:
+    """Enhanced generator data processing, cached on the source files' versions rather than by hashing the frames"""
     
     fuel_sources = []
     
     # Process generator fuel consumption data
-    if not gen_df.empty:
+    if not _gen_df.empty:
         try:
             # Find fuel consumption sensor
-            if 'entity_id' in gen_df.columns:
-                fuel_gen = gen_df[gen_df['entity_id'] == 'sensor.generator_fuel_consumed'].copy()
+            if 'entity_id' in _gen_df.columns:
+                fuel_gen = _gen_df[_gen_df['entity_id'] == 'sensor.generator_fuel_consumed'].copy()
             else:
-                fuel_gen = gen_df.copy()
+                fuel_gen = _gen_df.copy()
             
-            if not fuel_gen.empty and all(col in fuel_gen.columns for col in ['state', 'last_changed']):
+            if not fuel_gen.empty and REQUIRED_SENSOR_COLUMNS.issubset(fuel_gen.columns):
                 fuel_gen = process_timezone_data(fuel_gen)
                 fuel_gen = fuel_gen.sort_values('last_changed')
                 
                 # Convert state to numeric and clean
-                fuel_gen['state'] = pd.to_numeric(fuel_gen['state'], errors='coerce')
+                fuel_gen['state'] = pd.to_numeric(fuel_gen['state'], errors='coerce').astype('float32')
                 fuel_gen = fuel_gen.dropna(subset=['state'])
                 
                 # Calculate fuel delta (consumption)
-                fuel_gen['fuel_delta'] = fuel_gen['state'].diff().clip(lower=0).fillna(0)
+                fuel_gen['fuel_delta'] = positive_diff(fuel_gen['state'].to_numpy())
                 
                 # Remove unrealistic values (likely sensor resets)
                 fuel_gen = fuel_gen[fuel_gen['fuel_delta'] < 100]  # Max 100L per reading
@@ -636,28 +902,27 @@ def process_generator_data(gen_df: pd.DataFrame, fuel_level_df: pd.DataFrame, fu
             logger.error(f"Generator processing failed: {e}")
     
     # Process fuel level sensor data
-    if not fuel_level_df.empty:
+    if not _fuel_level_df.empty:
         try:
             # Find fuel level sensor
-            if 'entity_id' in fuel_level_df.columns:
-                level_df = fuel_level_df[fuel_level_df['entity_id'].str.contains('fuel_level', case=False, na=False)].copy()
+            if 'entity_id' in _fuel_level_df.columns:
+                level_df = _fuel_level_df[_fuel_level_df['entity_id'].str.contains('fuel_level', case=False, na=False)].copy()
             else:
-                level_df = fuel_level_df.copy()
+                level_df = _fuel_level_df.copy()
             
-            if not level_df.empty and all(col in level_df.columns for col in ['state', 'last_changed']):
+            if not level_df.empty and REQUIRED_SENSOR_COLUMNS.issubset(level_df.columns):
                 level_df = process_timezone_data(level_df)
                 level_df = level_df.sort_values('last_changed')
                 
                 # Convert and clean level data
-                level_df['state'] = pd.to_numeric(level_df['state'], errors='coerce')
+                level_df['state'] = pd.to_numeric(level_df['state'], errors='coerce').astype('float32')
                 level_df = level_df.dropna(subset=['state'])
                 
                 # Smooth the level data to reduce noise
                 level_df['level_smooth'] = level_df['state'].rolling(window=5, min_periods=1, center=True).median()
                 
                 # Calculate fuel consumption (negative level changes)
-                level_df['fuel_delta'] = -level_df['level_smooth'].diff().clip(upper=0)
-                level_df['fuel_delta'] = level_df['fuel_delta'].abs()
+                level_df['fuel_delta'] = positive_diff(-level_df['level_smooth'].to_numpy())
                 
                 # Remove unrealistic values
                 level_df = level_df[level_df['fuel_delta'] < 50]
@@ -677,27 +942,28 @@ def process_generator_data(gen_df: pd.DataFrame, fuel_level_df: pd.DataFrame, fu
         combined_fuel = pd.concat(fuel_sources, ignore_index=True)
         combined_fuel['timestamp'] = pd.to_datetime(combined_fuel['timestamp'])
         
-        # Aggregate daily consumption
-        daily_consumption = combined_fuel.groupby(combined_fuel['timestamp'].dt.date)['fuel_delta'].sum().reset_index()
+        # Aggregate daily consumption - grouping on the midnight-floored timestamps keeps an int64
+        # datetime key, so there is no per-row Python date object or second to_datetime pass
+        daily_consumption = combined_fuel.groupby(combined_fuel['timestamp'].dt.normalize())['fuel_delta'].sum().reset_index()
         daily_consumption.columns = ['date', 'liters']
-        daily_consumption['date'] = pd.to_datetime(daily_consumption['date'])
         
         # Apply fuel pricing
-        if not fuel_purchases_df.empty and 'date' in fuel_purchases_df.columns:
+        if not _fuel_purchases_df.empty and 'date' in _fuel_purchases_df.columns:
             try:
                 # Prepare price data
-                price_df = fuel_purchases_df[['date', 'price_per_litre']].copy()
+                price_df = _fuel_purchases_df[['date', 'price_per_litre']].copy()
                 price_df = price_df.dropna()
                 price_df = price_df.sort_values('date')
                 
-                # Merge with consumption data using forward fill for missing prices
-                daily_consumption = daily_consumption.sort_values('date')
-                daily_consumption = pd.merge_asof(
-                    daily_consumption, 
-                    price_df, 
-                    on='date', 
-                    direction='backward'
-                )
+                # Latest purchase price on or before each day: one binary search per day over the
+                # sorted purchase dates (both sides cast to ns so differing datetime units still line up)
+                daily_consumption = daily_consumption.sort_values('date', ignore_index=True)
+                price_dates = price_df['date'].to_numpy(dtype='datetime64[ns]')
+                positions = np.searchsorted(
+                    price_dates, daily_consumption['date'].to_numpy(dtype='datetime64[ns]'), side='right'
+                ) - 1
+                prices = np.append(price_df['price_per_litre'].to_numpy(dtype=float), np.nan)
+                daily_consumption['price_per_litre'] = prices[np.where(positions >= 0, positions, -1)]
                 
                 # Fill any remaining missing prices with default
                 daily_consumption['price_per_litre'] = daily_consumption['price_per_litre'].fillna(22.50)
@@ -727,7 +993,11 @@ def process_generator_data(gen_df: pd.DataFrame, fuel_level_df: pd.DataFrame, fu
         return pd.DataFrame(), {'cost': 0, 'liters': 0, 'avg_price': 0}
 
 # Process generator data
-daily_generator, generator_totals = process_generator_data(gen_df, fuel_level_df, fuel_purchases_df)
+generator_source_key = tuple(
+    source_version(DATA_SOURCES[name], df)
+    for name, df in (("generator", gen_df), ("fuel_level", fuel_level_df), ("fuel_purchase", fuel_purchases_df))
+)
+daily_generator, generator_totals = process_generator_data(generator_source_key, gen_df, fuel_level_df, fuel_purchases_df)
 
 # ==============================================================================
 # 4. ENHANCED SIDEBAR WITH IMPROVED DATE SELECTION
@@ -815,18 +1085,80 @@ with st.sidebar:
 
 # Filter data based on selected date range
 def filter_data_by_date(df: pd.DataFrame, date_col: str, start: datetime, end: datetime) -> pd.DataFrame:
-    """Filter dataframe by date range with proper error handling"""
-    if df.empty or date_col not in df.columns:
-        return df
-    
+    """Filter dataframe by date range with a binary search on the sorted date column"""
     try:
-        df[date_col] = pd.to_datetime(df[date_col])
-        mask = (df[date_col].dt.date >= start) & (df[date_col].dt.date <= end)
-        return df[mask].copy()
+        return slice_date_range(df, date_col, start, end)
     except Exception as e:
         logger.error(f"Date filtering failed: {e}")
         return df
 
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_solar_views(filtered_solar: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Derive the solar tab's power series, hourly profile and daily totals once per selected range"""
+    # Process solar data
+    solar_data = process_timezone_data(filtered_solar.copy())
+    
+    # Calculate total solar power (combining inverters)
+    power_cols = [col for col in solar_data.columns if 'power' in col.lower()]
+    if 'sum_grid_power' in solar_data.columns:
+        # Combined inverter output, already in kW from the loader
+        solar_data['total_kw'] = solar_data['sum_grid_power']
+    elif power_cols:
+        # Convert watts to kilowatts in one block assignment
+        solar_data[power_cols] = solar_data[power_cols].apply(pd.to_numeric, errors='coerce') / 1000
+        
+        solar_data['total_kw'] = solar_data[power_cols].sum(axis=1)
+    else:
+        st.warning("⚠️ No power data columns found in solar dataset")
+        solar_data['total_kw'] = 0
+    
+    # Energy per reading from the export's sampling interval (hourly for the inverter exports)
+    interval_hours = solar_data['last_changed'].diff().median() / pd.Timedelta(hours=1)
+    solar_data['energy_kwh'] = solar_data['total_kw'] * (0 if pd.isna(interval_hours) else interval_hours)
+    
+    # Hourly profile
+    hourly_avg = solar_data.groupby(solar_data['last_changed'].dt.hour.rename('hour'))['total_kw'].agg(['mean', 'max']).reset_index()
+    
+    # Daily totals
+    daily_summary = solar_data.groupby(solar_data['last_changed'].dt.date.rename('date')).agg({
+        'total_kw': ['max', 'mean'],
+        'energy_kwh': 'sum'
+    }).reset_index()
+    daily_summary.columns = ['date', 'peak_kw', 'avg_kw', 'total_kwh']
+    daily_summary['date'] = pd.to_datetime(daily_summary['date'])
+    
+    return solar_data, hourly_avg, daily_summary
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def build_factory_views(filtered_factory: pd.DataFrame) -> Optional[Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]]:
+    """Derive the factory tab's consumption series, daily totals and hourly profile once per selected range"""
+    factory_data = process_timezone_data(filtered_factory.copy())
+    
+    # Find consumption sensor
+    consumption_cols = [col for col in factory_data.columns if 'kwh' in col.lower()]
+    if not consumption_cols:
+        return None
+    main_sensor = consumption_cols[0]  # Use first kWh sensor
+    
+    # Process cumulative data (the loader already sorted readings by timestamp)
+    factory_data[main_sensor] = pd.to_numeric(factory_data[main_sensor], errors='coerce')
+    factory_data = factory_data.dropna(subset=[main_sensor])
+    
+    # Calculate daily consumption from cumulative
+    factory_data['daily_kwh'] = positive_diff(factory_data[main_sensor].to_numpy(dtype=float))
+    
+    # Remove unrealistic spikes (likely sensor resets)
+    factory_data = factory_data[factory_data['daily_kwh'] < 1000]
+    
+    # Daily totals
+    daily_summary = factory_data.groupby(factory_data['last_changed'].dt.date.rename('date'))['daily_kwh'].sum().reset_index()
+    daily_summary['date'] = pd.to_datetime(daily_summary['date'])
+    
+    # Hourly profile
+    hourly_avg = factory_data.groupby(factory_data['last_changed'].dt.hour.rename('hour'))['daily_kwh'].mean().reset_index()
+    
+    return factory_data, daily_summary, hourly_avg
+
 # Filter data for selected period
 filtered_generator = filter_data_by_date(daily_generator, 'date', start_date, end_date)
 filtered_solar = filter_data_by_date(solar_df, 'last_changed', start_date, end_date) if not solar_df.empty else pd.DataFrame()
@@ -1007,30 +1339,14 @@ with tab2:
     
     if not filtered_solar.empty:
         try:
-            # Process solar data
-            solar_data = filtered_solar.copy()
-            solar_data = process_timezone_data(solar_data)
-            
-            # Calculate total solar power (combining inverters)
-            power_cols = [col for col in solar_data.columns if 'power' in col.lower()]
-            if power_cols:
-                # Convert watts to kilowatts
-                for col in power_cols:
-                    solar_data[col] = pd.to_numeric(solar_data[col], errors='coerce') / 1000
-                
-                solar_data['total_kw'] = solar_data[power_cols].sum(axis=1)
-            else:
-                st.warning("⚠️ No power data columns found in solar dataset")
-                solar_data['total_kw'] = 0
-            
-            # Remove invalid/negative values
-            solar_data = solar_data[solar_data['total_kw'] >= 0]
+            # Derived frames are cached per selected range, so widget reruns skip the recomputation
+            solar_data, hourly_avg, daily_summary = build_solar_views(filtered_solar)
             
             if not solar_data.empty and solar_data['total_kw'].max() > 0:
                 # Summary metrics
                 peak_power = solar_data['total_kw'].max()
                 avg_power = solar_data['total_kw'].mean()
-                total_energy = solar_data['total_kw'].sum() / 4  # Assuming 15-min intervals
+                total_energy = solar_data['energy_kwh'].sum()
                 
                 col1, col2, col3 = st.columns(3)
                 
@@ -1076,48 +1392,21 @@ with tab2:
                 if len(solar_data) > 24:
                     st.markdown("### ⏰ Performance by Hour")
                     
-                    hourly_data = solar_data.copy()
-                    hourly_data['hour'] = hourly_data['last_changed'].dt.hour
-                    hourly_avg = hourly_data.groupby('hour')['total_kw'].agg(['mean', 'max']).reset_index()
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        create_enhanced_chart(
-                            hourly_avg,
-                            'hour',
-                            'mean',
-                            "Average Solar Power by Hour",
-                            color="#38a169",
-                            kind='bar',
-                            y_label="Average Power (kW)"
-                        )
-                    
-                    with col2:
-                        create_enhanced_chart(
-                            hourly_avg,
-                            'hour',
-                            'max',
-                            "Peak Solar Power by Hour",
-                            color="#d69e2e",
-                            kind='bar',
-                            y_label="Peak Power (kW)"
-                        )
+                    # Average and peak share the hour axis, so they go out as one figure
+                    create_stacked_bar_chart(
+                        hourly_avg,
+                        'hour',
+                        (
+                            ('mean', "Average Power (kW)", "#38a169"),
+                            ('max', "Peak Power (kW)", "#d69e2e")
+                        ),
+                        "Solar Power by Hour"
+                    )
                 
                 # Daily summary if multiple days
                 if period_days > 1:
                     st.markdown("### 📅 Daily Production Summary")
                     
-                    daily_solar = solar_data.copy()
-                    daily_solar['date'] = daily_solar['last_changed'].dt.date
-                    daily_summary = daily_solar.groupby('date').agg({
-                        'total_kw': ['max', 'mean', 'sum']
-                    }).reset_index()
-                    
-                    daily_summary.columns = ['date', 'peak_kw', 'avg_kw', 'total_kwh']
-                    daily_summary['total_kwh'] = daily_summary['total_kwh'] / 4  # Convert to kWh
-                    daily_summary['date'] = pd.to_datetime(daily_summary['date'])
-                    
                     create_enhanced_chart(
                         daily_summary,
                         'date',
@@ -1145,25 +1434,10 @@ with tab3:
     
     if not filtered_factory.empty:
         try:
-            factory_data = filtered_factory.copy()
-            factory_data = process_timezone_data(factory_data)
+            factory_views = build_factory_views(filtered_factory)
             
-            # Find consumption sensor
-            consumption_cols = [col for col in factory_data.columns if 'kwh' in col.lower()]
-            
-            if consumption_cols:
-                main_sensor = consumption_cols[0]  # Use first kWh sensor
-                
-                # Process cumulative data
-                factory_data[main_sensor] = pd.to_numeric(factory_data[main_sensor], errors='coerce')
-                factory_data = factory_data.dropna(subset=[main_sensor])
-                factory_data = factory_data.sort_values('last_changed')
-                
-                # Calculate daily consumption from cumulative
-                factory_data['daily_kwh'] = factory_data[main_sensor].diff().clip(lower=0).fillna(0)
-                
-                # Remove unrealistic spikes (likely sensor resets)
-                factory_data = factory_data[factory_data['daily_kwh'] < 1000]
+            if factory_views is not None:
+                factory_data, daily_summary, hourly_avg = factory_views
                 
                 total_consumption = factory_data['daily_kwh'].sum()
                 avg_consumption = factory_data['daily_kwh'].mean()
@@ -1214,11 +1488,6 @@ with tab3:
                     
                     # Daily breakdown if multiple days
                     if period_days > 1:
-                        daily_factory = factory_data.copy()
-                        daily_factory['date'] = daily_factory['last_changed'].dt.date
-                        daily_summary = daily_factory.groupby('date')['daily_kwh'].sum().reset_index()
-                        daily_summary['date'] = pd.to_datetime(daily_summary['date'])
-                        
                         create_enhanced_chart(
                             daily_summary,
                             'date',
@@ -1233,10 +1502,6 @@ with tab3:
                     if len(factory_data) > 24:
                         st.markdown("### ⏰ Usage Patterns")
                         
-                        hourly_factory = factory_data.copy()
-                        hourly_factory['hour'] = hourly_factory['last_changed'].dt.hour
-                        hourly_avg = hourly_factory.groupby('hour')['daily_kwh'].mean().reset_index()
-                        
                         create_enhanced_chart(
                             hourly_avg,
                             'hour',
@@ -1257,23 +1522,22 @@ with tab3:
     else:
         st.info("📊 No factory data available for the selected period.")
 
-with tab4:
+@st.fragment
+def render_invoice_editor() -> None:
+    """Invoice editor; runs as a fragment so editing its inputs doesn't rerun the analysis tabs"""
     st.markdown("## 📄 Invoice Management System")
     st.markdown("Automated billing document generation and editing")
     
     try:
-        response = safe_request(DATA_SOURCES["billing"])
-        if response:
-            buffer = io.BytesIO(response.content)
-            workbook = openpyxl.load_workbook(buffer, data_only=False)
-            worksheet = workbook.active
-            
-            # Extract current values with error handling
+        template = load_billing_template(DATA_SOURCES["billing"])
+        if template:
+            # Extract current values with error handling (the full workbook is only built to save an edit)
             try:
-                from_val = str(worksheet['B2'].value or "30/09/25")
-                to_val = str(worksheet['B3'].value or "31/10/25") 
-                freedom_units = float(worksheet['C7'].value or 0)
-                boerdery_units = float(worksheet['C9'].value or 0)
+                from_cell, to_cell, freedom_cell, boerdery_cell = read_invoice_fields(template)
+                from_val = str(from_cell or "30/09/25")
+                to_val = str(to_cell or "31/10/25") 
+                freedom_units = float(freedom_cell or 0)
+                boerdery_units = float(boerdery_cell or 0)
             except Exception as e:
                 logger.error(f"Error reading worksheet values: {e}")
                 from_val, to_val = "30/09/25", "31/10/25"
@@ -1348,16 +1612,13 @@ with tab4:
             # Generate updated invoice
             if st.button("🚀 Generate Updated Invoice", type="primary", use_container_width=True):
                 try:
-                    # Update worksheet values
-                    worksheet['B2'].value = new_from_date.strftime("%d/%m/%y")
-                    worksheet['B3'].value = new_to_date.strftime("%d/%m/%y")
-                    worksheet['C7'].value = new_freedom_units
-                    worksheet['C9'].value = new_boerdery_units
-                    
-                    # Save to buffer
-                    output_buffer = io.BytesIO()
-                    workbook.save(output_buffer)
-                    output_buffer.seek(0)
+                    # Patch the four cells straight into the cached template
+                    output_buffer = update_invoice_cells(template, {
+                        'B2': new_from_date.strftime("%d/%m/%y"),
+                        'B3': new_to_date.strftime("%d/%m/%y"),
+                        'C7': new_freedom_units,
+                        'C9': new_boerdery_units
+                    })
                     
                     # Generate filename
                     month_year = new_from_date.strftime("%b%Y")
@@ -1383,6 +1644,9 @@ with tab4:
         st.error(f"❌ Error loading invoice system: {str(e)}")
         logger.error(f"Invoice system failed: {e}")
 
+with tab4:
+    render_invoice_editor()
+
 # ==============================================================================
 # 6. FOOTER & SYSTEM INFO
 # ==============================================================================
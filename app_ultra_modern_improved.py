@@ -18,9 +18,16 @@ from datetime import datetime, timedelta, date
 import numpy as np
 import io
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from plotly.subplots import make_subplots
 import warnings
 warnings.filterwarnings('ignore')
+import os
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+from features.data_processing import slice_date_range, sort_by_timestamp
 
 # ==============================================================================
 # ULTRA-MODERN PAGE CONFIGURATION
@@ -262,6 +269,10 @@ apply_ultra_modern_styling()
 # SILENT DATA LOADING (NO CONSOLE MESSAGES)
 # ==============================================================================
 
+# Shared pooled session so GitHub fallbacks reuse one TCP/TLS connection and retry transient failures
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=Retry(total=2, backoff_factor=0.3)))
+
 @st.cache_data(ttl=3600, show_spinner=False)
 def load_all_energy_data_silent():
     """Silent data loading without console messages"""
@@ -270,17 +281,17 @@ def load_all_energy_data_silent():
     
     # Load primary data sources silently
     try:
-        data['generator'] = pd.read_csv('gen (2).csv')
+        data['generator'] = pd.read_csv('gen (2).csv', engine='pyarrow')
     except:
         data['generator'] = pd.DataFrame()
     
     try:
-        data['fuel_history'] = pd.read_csv('history (5).csv')
+        data['fuel_history'] = pd.read_csv('history (5).csv', engine='pyarrow')
     except:
         data['fuel_history'] = pd.DataFrame()
     
     try:
-        data['factory'] = pd.read_csv('FACTORY ELEC.csv')
+        data['factory'] = pd.read_csv('FACTORY ELEC.csv', engine='pyarrow')
     except:
         data['factory'] = pd.DataFrame()
     
@@ -293,14 +304,14 @@ def load_all_energy_data_silent():
     # Load new 3-inverter system data from GitHub
     try:
         # Load the new inverter system data
-        data['solar'] = pd.read_csv('New_inverter.csv')
+        data['solar'] = pd.read_csv('New_inverter.csv', engine='pyarrow')
         
         # If local file not found, try GitHub URL
         if data['solar'].empty:
             github_url = "https://raw.githubusercontent.com/Saint-Akim/Solar-performance/main/New_inverter.csv"
-            response = requests.get(github_url, timeout=10)
+            response = HTTP_SESSION.get(github_url, timeout=10)
             if response.status_code == 200:
-                data['solar'] = pd.read_csv(io.StringIO(response.text))
+                data['solar'] = pd.read_csv(io.BytesIO(response.content), engine='pyarrow')
         
         # Add source identifier for the new 3-inverter system
         if not data['solar'].empty:
@@ -319,7 +330,7 @@ def load_all_energy_data_silent():
             solar_data_list = []
             for file in solar_files:
                 try:
-                    df = pd.read_csv(file)
+                    df = pd.read_csv(file, engine='pyarrow')
                     if not df.empty:
                         df['source_file'] = file
                         df['system_type'] = 'Legacy System'
@@ -335,6 +346,10 @@ def load_all_energy_data_silent():
         except:
             data['solar'] = pd.DataFrame()
     
+    # Sensor exports are sorted by time once here so every date filter is a binary search
+    for key in ('generator', 'fuel_history', 'factory', 'solar'):
+        data[key] = sort_by_timestamp(data[key])
+    
     return data
 
 # ==============================================================================
@@ -419,10 +434,9 @@ def process_fuel_purchases_and_pricing(fuel_purchases_df):
             # Process dates
             fuel_purchases_df[date_cols[0]] = pd.to_datetime(fuel_purchases_df[date_cols[0]], errors='coerce')
             
-            # Process prices and quantities
-            for col in price_cols + quantity_cols:
-                if col in fuel_purchases_df.columns:
-                    fuel_purchases_df[col] = pd.to_numeric(fuel_purchases_df[col], errors='coerce')
+            # Process prices and quantities in one block assignment (a column can match both lists)
+            numeric_cols = list(dict.fromkeys(price_cols + quantity_cols))
+            fuel_purchases_df[numeric_cols] = fuel_purchases_df[numeric_cols].apply(pd.to_numeric, errors='coerce')
             
             # Calculate price per liter if not directly available
             if quantity_cols and len(price_cols) > 0:
@@ -449,6 +463,12 @@ def process_fuel_purchases_and_pricing(fuel_purchases_df):
     
     return pd.DataFrame(), 22.50
 
+def calendar_days(timestamps):
+    """Timestamps floored to midnight as naive datetimes, for grouping readings by day"""
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_localize(None)
+    return timestamps.dt.normalize()
+
 def calculate_enhanced_fuel_analysis(gen_df, fuel_history_df, fuel_purchases_df, start_date, end_date):
     """Enhanced fuel analysis with real pricing and purchase comparison"""
     
@@ -470,7 +490,7 @@ def calculate_enhanced_fuel_analysis(gen_df, fuel_history_df, fuel_purchases_df,
         fuel_purchases_filtered = pd.DataFrame()
     
     # Process consumption data
-    gen_filtered['last_changed'] = pd.to_datetime(gen_filtered['last_changed'])
+    gen_filtered['last_changed'] = pd.to_datetime(gen_filtered['last_changed'], format='ISO8601')
     gen_filtered['state'] = pd.to_numeric(gen_filtered['state'], errors='coerce')
     
     # Extract sensor data
@@ -478,62 +498,54 @@ def calculate_enhanced_fuel_analysis(gen_df, fuel_history_df, fuel_purchases_df,
     runtime_data = gen_filtered[gen_filtered['entity_id'] == 'sensor.generator_runtime_duration'].copy()
     efficiency_data = gen_filtered[gen_filtered['entity_id'] == 'sensor.generator_fuel_efficiency'].copy()
     
-    daily_fuel = []
-    
+    # Purchase dates sorted once so each day's latest price is a binary search, not a frame scan
+    purchase_dates = None
+    if not fuel_purchases_filtered.empty and 'price_per_litre' in fuel_purchases_filtered.columns:
+        purchase_date_col = [col for col in fuel_purchases_filtered.columns if 'date' in col][0]
+        purchases = fuel_purchases_filtered.sort_values(purchase_date_col, kind='stable')
+        purchase_dates = purchases[purchase_date_col].to_numpy(dtype='datetime64[ns]')
+        purchase_prices = purchases['price_per_litre'].to_numpy()
+    
+    # Daily figures come from one grouped pass per sensor on a precomputed day key; prices and
+    # costs are then whole-column operations instead of a dict built per day
+    daily_fuel_df = pd.DataFrame()
     if not fuel_consumed_data.empty:
-        fuel_consumed_data['date'] = fuel_consumed_data['last_changed'].dt.date
+        day_readings = fuel_consumed_data.groupby(calendar_days(fuel_consumed_data['last_changed']))['state']
+        # Readings arrive time-sorted, so nth keeps each day's first/last reading even when it is missing
+        first_reading = day_readings.nth(0).to_numpy()
+        fuel_reading = day_readings.nth(-1).to_numpy()
+        readings_count = day_readings.size()
+        daily_consumption = np.where(fuel_reading >= first_reading, fuel_reading - first_reading, fuel_reading)
         
-        # Process daily consumption with real pricing
-        for date, day_data in fuel_consumed_data.groupby('date'):
-            if len(day_data) > 0:
-                fuel_reading = day_data['state'].iloc[-1]
-                first_reading = day_data['state'].iloc[0]
-                daily_consumption = max(0, fuel_reading - first_reading) if fuel_reading >= first_reading else fuel_reading
-                
-                # Get price for this date (use closest purchase price or average)
-                date_price = avg_fuel_price
-                if not fuel_purchases_filtered.empty:
-                    date_col = [col for col in fuel_purchases_filtered.columns if 'date' in col][0]
-                    closest_purchase = fuel_purchases_filtered[fuel_purchases_filtered[date_col] <= pd.to_datetime(date)]
-                    if not closest_purchase.empty and 'price_per_litre' in closest_purchase.columns:
-                        date_price = closest_purchase['price_per_litre'].iloc[-1]
-                
-                daily_fuel.append({
-                    'date': pd.to_datetime(date),
-                    'fuel_consumed_liters': daily_consumption,
-                    'fuel_price_per_liter': date_price,
-                    'daily_cost_rands': daily_consumption * date_price,
-                    'cumulative_reading': fuel_reading,
-                    'readings_count': len(day_data)
-                })
+        # Get price for each date (latest purchase price on or before it, else the average)
+        date_price = np.full(len(readings_count), avg_fuel_price, dtype=float)
+        if purchase_dates is not None:
+            positions = np.searchsorted(purchase_dates, readings_count.index.to_numpy(dtype='datetime64[ns]'), side='right') - 1
+            date_price = np.where(positions >= 0, purchase_prices[np.maximum(positions, 0)], date_price)
+        
+        daily_fuel_df = pd.DataFrame({
+            'date': readings_count.index,
+            'fuel_consumed_liters': daily_consumption,
+            'fuel_price_per_liter': date_price,
+            'daily_cost_rands': daily_consumption * date_price,
+            'cumulative_reading': fuel_reading,
+            'readings_count': readings_count.to_numpy()
+        })
     
     # Process runtime and efficiency data
-    runtime_summary = []
+    runtime_df = pd.DataFrame()
     if not runtime_data.empty:
-        runtime_data['date'] = runtime_data['last_changed'].dt.date
-        for date, day_data in runtime_data.groupby('date'):
-            runtime_summary.append({
-                'date': pd.to_datetime(date),
-                'runtime_hours': day_data['state'].sum(),
-                'avg_runtime': day_data['state'].mean()
-            })
-    
-    efficiency_summary = []
+        runtime_df = runtime_data.groupby(calendar_days(runtime_data['last_changed']).rename('date'))['state'].agg(
+            runtime_hours='sum', avg_runtime='mean'
+        ).reset_index()
+    
+    efficiency_df = pd.DataFrame()
     if not efficiency_data.empty:
-        efficiency_data['date'] = efficiency_data['last_changed'].dt.date
-        for date, day_data in efficiency_data.groupby('date'):
-            efficiency_summary.append({
-                'date': pd.to_datetime(date),
-                'efficiency_percent': day_data['state'].mean(),
-                'min_efficiency': day_data['state'].min(),
-                'max_efficiency': day_data['state'].max()
-            })
+        efficiency_df = efficiency_data.groupby(calendar_days(efficiency_data['last_changed']).rename('date'))['state'].agg(
+            efficiency_percent='mean', min_efficiency='min', max_efficiency='max'
+        ).reset_index()
     
     # Combine datasets
-    daily_fuel_df = pd.DataFrame(daily_fuel)
-    runtime_df = pd.DataFrame(runtime_summary)
-    efficiency_df = pd.DataFrame(efficiency_summary)
-    
     if not daily_fuel_df.empty:
         if not runtime_df.empty:
             daily_fuel_df = pd.merge(daily_fuel_df, runtime_df, on='date', how='left')
@@ -578,8 +590,9 @@ def process_enhanced_solar_analysis(solar_df, start_date, end_date):
         return pd.DataFrame(), {}, pd.DataFrame(), pd.DataFrame()
     
     # Clean and process
-    solar_filtered['last_changed'] = pd.to_datetime(solar_filtered['last_changed'])
-    solar_filtered['state'] = pd.to_numeric(solar_filtered['state'], errors='coerce')
+    solar_filtered['last_changed'] = pd.to_datetime(solar_filtered['last_changed'], format='ISO8601')
+    # float32 is ample for inverter telemetry and halves the bytes every groupby below touches
+    solar_filtered['state'] = pd.to_numeric(solar_filtered['state'], errors='coerce').astype('float32')
     
     # IMPORTANT: Ensure only positive values (fix negative values issue)
     solar_filtered = solar_filtered[solar_filtered['state'] >= 0]
@@ -682,14 +695,8 @@ def process_enhanced_solar_analysis(solar_df, start_date, end_date):
 
 def filter_data_by_date_range(df, date_col, start_date, end_date):
     """Filter dataframe by date range"""
-    if df.empty or date_col not in df.columns:
-        return df
-    
     try:
-        df = df.copy()
-        df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-        mask = (df[date_col].dt.date >= start_date) & (df[date_col].dt.date <= end_date)
-        return df[mask].copy()
+        return slice_date_range(df, date_col, start_date, end_date)
     except:
         return df
 
@@ -765,24 +772,31 @@ def create_date_range_selector(key_prefix="global"):
 # ENHANCED CHART FUNCTIONS (FIXED use_container_width)
 # ==============================================================================
 
-def create_ultra_interactive_chart(df, x_col, y_col, title, color="#3b82f6", chart_type="bar", 
-                                 height=500, enable_zoom=True, enable_selection=True):
-    """Ultra-interactive charts with advanced zoom, pan, and selection capabilities"""
-    
-    if df.empty or x_col not in df.columns or y_col not in df.columns:
-        st.info(f"📊 No data available for {title}")
-        return None, None
-    
-    # Clean data
-    df_clean = df.dropna(subset=[x_col, y_col]).copy()
-    
-    if df_clean.empty:
-        st.info(f"📊 No valid data for {title}")
-        return None, None
-    
+# Longest series a line/area/scatter trace ships to the browser before it is downsampled
+MAX_CHART_POINTS = 4000
+
+def m4_indices(x, y, n_bins):
+    """Row positions of the first, last, min and max point in each of n_bins equal-width x bins (M4)"""
+    n = len(x)
+    span = x[-1] - x[0]
+    if n <= 4 * n_bins or span <= 0:
+        return np.arange(n)
+    
+    # x is sorted, so bin numbers never decrease and each bin is one contiguous run of rows
+    bins = np.minimum(((x - x[0]) / span * n_bins).astype(np.int64), n_bins - 1)
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    
+    # Ordering rows by (bin, y) puts each bin's minimum at its start and maximum at its end
+    order = np.lexsort((y, bins))
+    return np.unique(np.concatenate([starts, ends, order[starts], order[ends]]))
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_ultra_interactive_figure(df_clean, x_col, y_col, title, color, chart_type, height, enable_selection):
+    """Build the Plotly figure for a cleaned, downsampled frame, cached per data and style"""
     fig = go.Figure()
     
-    # Create trace based on chart type
+    # Create trace based on chart type (non-bar traces draw on one WebGL canvas instead of SVG nodes)
     if chart_type == "bar":
         fig.add_trace(go.Bar(
             x=df_clean[x_col],
@@ -799,11 +813,11 @@ def create_ultra_interactive_chart(df, x_col, y_col, title, color="#3b82f6", cha
             name=title
         ))
     elif chart_type == "line":
-        fig.add_trace(go.Scatter(
+        fig.add_trace(go.Scattergl(
             x=df_clean[x_col],
             y=df_clean[y_col],
             mode='lines+markers',
-            line=dict(color=color, width=3, shape='spline'),
+            line=dict(color=color, width=3),
             marker=dict(
                 size=8,
                 color=color,
@@ -814,7 +828,7 @@ def create_ultra_interactive_chart(df, x_col, y_col, title, color="#3b82f6", cha
             name=title
         ))
     elif chart_type == "area":
-        fig.add_trace(go.Scatter(
+        fig.add_trace(go.Scattergl(
             x=df_clean[x_col],
             y=df_clean[y_col],
             fill='tozeroy',
@@ -825,7 +839,7 @@ def create_ultra_interactive_chart(df, x_col, y_col, title, color="#3b82f6", cha
             name=title
         ))
     elif chart_type == "scatter":
-        fig.add_trace(go.Scatter(
+        fig.add_trace(go.Scattergl(
             x=df_clean[x_col],
             y=df_clean[y_col],
             mode='markers',
@@ -889,6 +903,43 @@ def create_ultra_interactive_chart(df, x_col, y_col, title, color="#3b82f6", cha
         )
     )
     
+    # Enable selection if requested
+    if enable_selection:
+        fig.update_layout(
+            dragmode='select',
+            selectdirection='diagonal'
+        )
+    
+    return fig
+
+def create_ultra_interactive_chart(df, x_col, y_col, title, color="#3b82f6", chart_type="bar", 
+                                 height=500, enable_zoom=True, enable_selection=True):
+    """Ultra-interactive charts with advanced zoom, pan, and selection capabilities"""
+    
+    if df.empty or x_col not in df.columns or y_col not in df.columns:
+        st.info(f"📊 No data available for {title}")
+        return None, None
+    
+    # Clean data
+    df_clean = df.dropna(subset=[x_col, y_col])
+    
+    if df_clean.empty:
+        st.info(f"📊 No valid data for {title}")
+        return None, None
+    
+    # Downsample long time series to at most four points per bin (pixel-accurate at chart width)
+    if chart_type != "bar" and len(df_clean) > MAX_CHART_POINTS and df_clean[x_col].is_monotonic_increasing:
+        x_numeric = df_clean[x_col]
+        if pd.api.types.is_datetime64_any_dtype(x_numeric):
+            x_numeric = x_numeric.astype('int64')
+        try:
+            keep = m4_indices(x_numeric.to_numpy(dtype=float), df_clean[y_col].to_numpy(dtype=float), MAX_CHART_POINTS // 4)
+            df_clean = df_clean.iloc[keep]
+        except (TypeError, ValueError):
+            pass
+    
+    fig = build_ultra_interactive_figure(df_clean, x_col, y_col, title, color, chart_type, height, enable_selection)
+    
     # Advanced configuration
     config = {
         'displayModeBar': True,
@@ -905,13 +956,6 @@ def create_ultra_interactive_chart(df, x_col, y_col, title, color="#3b82f6", cha
         'scrollZoom': enable_zoom
     }
     
-    # Enable selection if requested
-    if enable_selection:
-        fig.update_layout(
-            dragmode='select',
-            selectdirection='diagonal'
-        )
-    
     # Display chart with FIXED width parameter
     chart = st.plotly_chart(fig, width='stretch', config=config, key=f"chart_{title.replace(' ', '_')}")
     
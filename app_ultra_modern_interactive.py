@@ -14,10 +14,18 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta, date
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import io
+import os
 import requests
 from plotly.subplots import make_subplots
+import sys
+sys.path.append(os.path.dirname(__file__))
+
+from features.data_processing import downcast_sensor_readings, lttb_indices, slice_date_range, sort_by_timestamp
 
 # ==============================================================================
 # ULTRA-MODERN PAGE CONFIGURATION
@@ -441,6 +449,9 @@ def render_ultra_modern_metric(label, value, delta=None, color="blue", icon="
         </div>
     """, unsafe_allow_html=True)
 
+# Longest series a line/area/scatter trace ships to the browser before it is downsampled
+MAX_CHART_POINTS = 2000
+
 def create_ultra_interactive_chart(df, x_col, y_col, title, color="#3b82f6", chart_type="bar", 
                                  height=500, enable_zoom=True, enable_selection=True):
     """Ultra-interactive charts with advanced zoom, pan, and selection capabilities"""
@@ -461,9 +472,20 @@ def create_ultra_interactive_chart(df, x_col, y_col, title, color="#3b82f6", cha
         st.info(f"📊 No valid data for {title}")
         return None, None
     
+    # Downsample long time series so only a few thousand points per trace reach the browser
+    if chart_type != "bar" and len(df_clean) > MAX_CHART_POINTS and df_clean[x_col].is_monotonic_increasing:
+        x_numeric = df_clean[x_col]
+        if pd.api.types.is_datetime64_any_dtype(x_numeric):
+            x_numeric = x_numeric.astype('int64')
+        try:
+            keep = lttb_indices(x_numeric.to_numpy(dtype=float), df_clean[y_col].to_numpy(dtype=float), MAX_CHART_POINTS)
+            df_clean = df_clean.iloc[keep]
+        except (TypeError, ValueError):
+            pass
+    
     fig = go.Figure()
     
-    # Create trace based on chart type
+    # Create trace based on chart type (non-bar traces draw on one WebGL canvas instead of SVG nodes)
     if chart_type == "bar":
         fig.add_trace(go.Bar(
             x=df_clean[x_col],
@@ -480,11 +502,11 @@ def create_ultra_interactive_chart(df, x_col, y_col, title, color="#3b82f6", cha
             name=title
         ))
     elif chart_type == "line":
-        fig.add_trace(go.Scatter(
+        fig.add_trace(go.Scattergl(
             x=df_clean[x_col],
             y=df_clean[y_col],
             mode='lines+markers',
-            line=dict(color=color, width=3, shape='spline'),
+            line=dict(color=color, width=3),
             marker=dict(
                 size=8,
                 color=color,
@@ -495,7 +517,7 @@ def create_ultra_interactive_chart(df, x_col, y_col, title, color="#3b82f6", cha
             name=title
         ))
     elif chart_type == "area":
-        fig.add_trace(go.Scatter(
+        fig.add_trace(go.Scattergl(
             x=df_clean[x_col],
             y=df_clean[y_col],
             fill='tozeroy',
@@ -506,7 +528,7 @@ def create_ultra_interactive_chart(df, x_col, y_col, title, color="#3b82f6", cha
             name=title
         ))
     elif chart_type == "scatter":
-        fig.add_trace(go.Scatter(
+        fig.add_trace(go.Scattergl(
             x=df_clean[x_col],
             y=df_clean[y_col],
             mode='markers',
@@ -610,6 +632,40 @@ def create_ultra_interactive_chart(df, x_col, y_col, title, color="#3b82f6", cha
 # ADVANCED DATA LOADING WITH CACHING AND PROGRESS
 # ==============================================================================
 
+def normalize_entity_ids(df):
+    """Store entity_id as a stripped, lower-cased categorical so sensor filters run per category"""
+    if df.empty or 'entity_id' not in df.columns:
+        return df
+    
+    # String work happens once per distinct sensor name, not once per reading
+    entity_ids = df['entity_id'].astype('category')
+    categories = entity_ids.cat.categories
+    normalized = dict(zip(categories, categories.astype(str).str.strip().str.lower()))
+    df['entity_id'] = entity_ids.map(normalized).astype('category')
+    return df
+
+# Solar exports share one schema; non-numeric states parse straight to nulls
+SOLAR_CSV_CONVERT_OPTIONS = pa_csv.ConvertOptions(
+    column_types={'state': pa.float32()},
+    null_values=['', 'NaN', 'nan', 'unavailable', 'unknown'],
+    strings_can_be_null=True
+)
+
+def read_solar_table(file):
+    """Parse one solar export to an Arrow table tagged with its source file and month"""
+    table = pa_csv.read_csv(file, convert_options=SOLAR_CSV_CONVERT_OPTIONS)
+    
+    # Constant labels as single-entry dictionary columns (they arrive in pandas as categoricals)
+    indices = pa.array(np.zeros(table.num_rows, dtype=np.int32))
+    month = file.split('_')[-1].replace('.csv', '')
+    table = table.append_column('source_file', pa.DictionaryArray.from_arrays(indices, pa.array([file])))
+    return table.append_column('month', pa.DictionaryArray.from_arrays(indices, pa.array([month])))
+
+@st.cache_data(show_spinner=False, max_entries=16, persist="disk")
+def read_excel_file(path, mtime, size):
+    """Parse one workbook; cached on disk per (path, mtime, size) so openpyxl only runs when the file changes"""
+    return pd.read_excel(path)
+
 @st.cache_data(ttl=3600, show_spinner=False)
 def load_all_energy_data_advanced():
     """Advanced data loading with detailed progress and error handling"""
@@ -641,9 +697,10 @@ def load_all_energy_data_advanced():
         loading_progress.info(f"🔄 Loading {key} data...")
         try:
             if source['type'] == 'csv':
-                data[key] = pd.read_csv(source['file'])
+                data[key] = sort_by_timestamp(downcast_sensor_readings(normalize_entity_ids(pd.read_csv(source['file'], engine='pyarrow'))))
             else:  # Excel
-                data[key] = pd.read_excel(source['file'])
+                stat = os.stat(source['file'])
+                data[key] = read_excel_file(source['file'], stat.st_mtime, stat.st_size)
             
             loading_progress.success(f"✅ {key}: {len(data[key])} records loaded")
         except Exception as e:
@@ -653,29 +710,32 @@ def load_all_energy_data_advanced():
         current_file += 1
         progress_bar.progress(current_file / total_files)
     
-    # Load solar data
-    solar_data_list = []
-    for file in solar_files:
-        loading_progress.info(f"🔄 Loading {file}...")
-        try:
-            df = pd.read_csv(file)
-            if not df.empty:
-                df['source_file'] = file
-                df['month'] = file.split('_')[-1].replace('.csv', '')
-                solar_data_list.append(df)
-                loading_progress.success(f"✅ {file}: {len(df)} records")
-            else:
-                loading_progress.info(f"ℹ️ {file}: Empty file")
-        except Exception as e:
-            loading_progress.info(f"ℹ️ {file}: {str(e)}")
-        
-        current_file += 1
-        progress_bar.progress(current_file / total_files)
-    
-    # Combine solar data
-    if solar_data_list:
-        data['solar'] = pd.concat(solar_data_list, ignore_index=True)
-        loading_progress.success(f"✅ Solar: {len(data['solar'])} total records from {len(solar_data_list)} files")
+    # Load solar data - files parse concurrently on a bounded pool (Arrow releases the GIL
+    # while parsing); progress is still reported in file order as each result is collected
+    solar_tables = []
+    with ThreadPoolExecutor(max_workers=min(8, len(solar_files))) as executor:
+        futures = [executor.submit(read_solar_table, file) for file in solar_files]
+        
+        for file, future in zip(solar_files, futures):
+            loading_progress.info(f"🔄 Loading {file}...")
+            try:
+                table = future.result()
+                if table.num_rows:
+                    solar_tables.append(table)
+                    loading_progress.success(f"✅ {file}: {table.num_rows} records")
+                else:
+                    loading_progress.info(f"ℹ️ {file}: Empty file")
+            except Exception as e:
+                loading_progress.info(f"ℹ️ {file}: {str(e)}")
+            
+            current_file += 1
+            progress_bar.progress(current_file / total_files)
+    
+    # Combine solar data - Arrow concatenates the tables without copying, then one conversion to pandas
+    if solar_tables:
+        solar_df = pa.concat_tables(solar_tables, promote_options='permissive').to_pandas()
+        data['solar'] = sort_by_timestamp(downcast_sensor_readings(normalize_entity_ids(solar_df)))
+        loading_progress.success(f"✅ Solar: {len(data['solar'])} total records from {len(solar_tables)} files")
     else:
         data['solar'] = pd.DataFrame()
         loading_progress.warning("⚠️ No solar data available")
@@ -687,24 +747,19 @@ def load_all_energy_data_advanced():
     return data
 
 def filter_data_by_date_range(df, date_col, start_date, end_date):
-    """Advanced date filtering with timezone handling"""
-    if df.empty or date_col not in df.columns:
-        return df
-    
+    """Advanced date filtering with timezone handling, sliced by binary search"""
     try:
-        # Convert to datetime
-        df = df.copy()
-        df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-        
-        # Filter by date range
-        mask = (df[date_col].dt.date >= start_date) & (df[date_col].dt.date <= end_date)
-        filtered_df = df[mask].copy()
-        
-        return filtered_df
+        return slice_date_range(df, date_col, start_date, end_date)
     except Exception as e:
         st.warning(f"Date filtering error: {e}")
         return df
 
+def calendar_days(timestamps):
+    """Timestamps floored to midnight as naive datetimes, for grouping readings by day"""
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_localize(None)
+    return timestamps.dt.normalize()
+
 # ==============================================================================
 # ADVANCED FUEL CALCULATION FUNCTIONS
 # ==============================================================================
@@ -720,7 +775,7 @@ def calculate_advanced_fuel_analysis(gen_df, fuel_history_df, start_date, end_da
     fuel_filtered = filter_data_by_date_range(fuel_history_df, 'last_changed', start_date, end_date)
     
     # Process timestamps
-    gen_filtered['last_changed'] = pd.to_datetime(gen_filtered['last_changed'])
+    gen_filtered['last_changed'] = pd.to_datetime(gen_filtered['last_changed'], format='ISO8601')
     gen_filtered['state'] = pd.to_numeric(gen_filtered['state'], errors='coerce')
     
     # Extract different sensor types
@@ -729,68 +784,52 @@ def calculate_advanced_fuel_analysis(gen_df, fuel_history_df, start_date, end_da
     efficiency_data = gen_filtered[gen_filtered['entity_id'] == 'sensor.generator_fuel_efficiency'].copy()
     fuel_per_kwh_data = gen_filtered[gen_filtered['entity_id'] == 'sensor.generator_fuel_per_kwh'].copy()
     
-    daily_fuel = []
-    
+    # Daily summaries are built column-wise from one grouped pass per sensor rather than a
+    # dict appended per day
+    daily_fuel_df = pd.DataFrame()
     if not fuel_consumed_data.empty:
-        fuel_consumed_data['date'] = fuel_consumed_data['last_changed'].dt.date
-        
-        # Process daily fuel consumption
-        for date, day_data in fuel_consumed_data.groupby('date'):
-            if len(day_data) > 0:
-                fuel_reading = day_data['state'].iloc[-1]  # Last reading of day
-                first_reading = day_data['state'].iloc[0]   # First reading of day
-                
-                # Calculate consumption as difference (for cumulative sensors)
-                daily_consumption = max(0, fuel_reading - first_reading) if fuel_reading >= first_reading else fuel_reading
-                
-                daily_fuel.append({
-                    'date': pd.to_datetime(date),
-                    'fuel_consumed_liters': daily_consumption,
-                    'cumulative_reading': fuel_reading,
-                    'readings_count': len(day_data),
-                    'first_reading': first_reading,
-                    'last_reading': fuel_reading
-                })
+        day_readings = fuel_consumed_data.groupby(calendar_days(fuel_consumed_data['last_changed']))['state']
+        # Readings arrive time-sorted, so nth keeps each day's first/last reading even when it is missing
+        first_reading = day_readings.nth(0).to_numpy()   # First reading of day
+        fuel_reading = day_readings.nth(-1).to_numpy()   # Last reading of day
+        readings_count = day_readings.size()
+        
+        # Calculate consumption as difference (for cumulative sensors)
+        daily_fuel_df = pd.DataFrame({
+            'date': readings_count.index,
+            'fuel_consumed_liters': np.where(fuel_reading >= first_reading, fuel_reading - first_reading, fuel_reading).astype('float64'),
+            'cumulative_reading': fuel_reading,
+            'readings_count': readings_count.to_numpy(),
+            'first_reading': first_reading,
+            'last_reading': fuel_reading
+        })
     
     # Process runtime data
-    runtime_summary = []
+    runtime_df = pd.DataFrame()
     if not runtime_data.empty:
-        runtime_data['date'] = runtime_data['last_changed'].dt.date
-        for date, day_data in runtime_data.groupby('date'):
-            total_runtime = day_data['state'].sum()
-            runtime_summary.append({
-                'date': pd.to_datetime(date),
-                'runtime_hours': total_runtime,
-                'avg_runtime': day_data['state'].mean()
-            })
+        runtime_df = runtime_data.groupby(calendar_days(runtime_data['last_changed']).rename('date'))['state'].agg(
+            runtime_hours='sum', avg_runtime='mean'
+        )
     
     # Process efficiency data
-    efficiency_summary = []
+    efficiency_df = pd.DataFrame()
     if not efficiency_data.empty:
-        efficiency_data['date'] = efficiency_data['last_changed'].dt.date
-        for date, day_data in efficiency_data.groupby('date'):
-            avg_efficiency = day_data['state'].mean()
-            efficiency_summary.append({
-                'date': pd.to_datetime(date),
-                'efficiency_percent': avg_efficiency,
-                'min_efficiency': day_data['state'].min(),
-                'max_efficiency': day_data['state'].max()
-            })
-    
-    # Combine all data
-    daily_fuel_df = pd.DataFrame(daily_fuel)
-    runtime_df = pd.DataFrame(runtime_summary)
-    efficiency_df = pd.DataFrame(efficiency_summary)
+        efficiency_df = efficiency_data.groupby(calendar_days(efficiency_data['last_changed']).rename('date'))['state'].agg(
+            efficiency_percent='mean', min_efficiency='min', max_efficiency='max'
+        )
     
-    # Merge datasets
+    # Merge datasets - the day-indexed summaries attach in one aligned join rather than a merge per sensor
     if not daily_fuel_df.empty:
-        if not runtime_df.empty:
-            daily_fuel_df = pd.merge(daily_fuel_df, runtime_df, on='date', how='left')
-            daily_fuel_df['fuel_per_hour'] = daily_fuel_df['fuel_consumed_liters'] / daily_fuel_df['runtime_hours']
-            daily_fuel_df['fuel_per_hour'] = daily_fuel_df['fuel_per_hour'].replace([np.inf, -np.inf], 0).fillna(0)
+        daily_summaries = [summary for summary in (runtime_df, efficiency_df) if not summary.empty]
+        if daily_summaries:
+            daily_fuel_df = daily_fuel_df.set_index('date').join(daily_summaries, how='left').reset_index()
         
-        if not efficiency_df.empty:
-            daily_fuel_df = pd.merge(daily_fuel_df, efficiency_df, on='date', how='left')
+        if not runtime_df.empty:
+            fuel_per_hour = daily_fuel_df['fuel_consumed_liters'] / daily_fuel_df['runtime_hours']
+            daily_fuel_df.insert(
+                daily_fuel_df.columns.get_loc('avg_runtime') + 1, 'fuel_per_hour',
+                fuel_per_hour.replace([np.inf, -np.inf], 0).fillna(0)
+            )
         
         # Add cost calculations with dynamic pricing
         daily_fuel_df['fuel_price_per_liter'] = 22.50  # Base price
@@ -832,7 +871,7 @@ def validate_tank_levels_advanced(fuel_history_df, start_date, end_date):
     if fuel_history_df.empty:
         return pd.DataFrame()
     
-    fuel_history_df['last_changed'] = pd.to_datetime(fuel_history_df['last_changed'])
+    fuel_history_df['last_changed'] = pd.to_datetime(fuel_history_df['last_changed'], format='ISO8601')
     fuel_history_df['state'] = pd.to_numeric(fuel_history_df['state'], errors='coerce')
     
     start_levels = fuel_history_df[fuel_history_df['entity_id'] == 'sensor.generator_fuel_level_start'].copy()
@@ -881,7 +920,7 @@ def process_advanced_solar_analysis(solar_df, start_date, end_date):
         return pd.DataFrame(), {}, pd.DataFrame(), pd.DataFrame()
     
     # Clean and process
-    solar_filtered['last_changed'] = pd.to_datetime(solar_filtered['last_changed'])
+    solar_filtered['last_changed'] = pd.to_datetime(solar_filtered['last_changed'], format='ISO8601')
     solar_filtered['state'] = pd.to_numeric(solar_filtered['state'], errors='coerce')
     
     # Identify different sensor types
@@ -901,7 +940,7 @@ def process_advanced_solar_analysis(solar_df, start_date, end_date):
         power_sensors['hour'] = power_sensors['last_changed'].dt.hour
         
         # Daily solar generation by inverter
-        daily_by_inverter = power_sensors.groupby(['date', 'entity_id']).agg({
+        daily_by_inverter = power_sensors.groupby(['date', 'entity_id'], observed=True).agg({
             'power_kw': ['sum', 'max', 'mean', 'count']
         }).reset_index()
         daily_by_inverter.columns = ['date', 'inverter', 'total_kwh', 'peak_kw', 'avg_kw', 'readings']
@@ -981,6 +1020,9 @@ def process_advanced_solar_analysis(solar_df, start_date, end_date):
 # ADVANCED FACTORY ANALYSIS AND MAIN APPLICATION
 # ==============================================================================
 
+# Day labels indexed by pandas dayofweek (Monday=0), looked up positionally
+WEEKDAY_LABELS = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])
+
 def analyze_advanced_factory_consumption(factory_df, start_date, end_date):
     """Advanced factory analysis with date filtering and load optimization"""
     
@@ -994,7 +1036,7 @@ def analyze_advanced_factory_consumption(factory_df, start_date, end_date):
         return pd.DataFrame(), {}, pd.DataFrame()
     
     # Clean and process
-    factory_filtered['last_changed'] = pd.to_datetime(factory_filtered['last_changed'])
+    factory_filtered['last_changed'] = pd.to_datetime(factory_filtered['last_changed'], format='ISO8601')
     factory_filtered['state'] = pd.to_numeric(factory_filtered['state'], errors='coerce')
     
     # Process energy consumption
@@ -1035,9 +1077,7 @@ def analyze_advanced_factory_consumption(factory_df, start_date, end_date):
             lambda x: x.diff().mean() if len(x) > 1 else 0
         ).reset_index()
         load_patterns_data.columns = ['weekday', 'hour', 'avg_consumption']
-        load_patterns_data['day_name'] = load_patterns_data['weekday'].map({
-            0:'Monday', 1:'Tuesday', 2:'Wednesday', 3:'Thursday', 4:'Friday', 5:'Saturday', 6:'Sunday'
-        })
+        load_patterns_data['day_name'] = WEEKDAY_LABELS[load_patterns_data['weekday'].to_numpy()]
         load_patterns = load_patterns_data.to_dict('records')
     
     daily_consumption_df = pd.DataFrame(daily_consumption)
@@ -0,0 +1,86 @@
+"""
+Shared Data Processing Helpers for Solar Performance Dashboard
+=============================================================
+Reading downcasts, timestamp sorting, binary-search date filtering and chart downsampling
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Tuple
+
+def downcast_sensor_readings(df: pd.DataFrame, category_columns: Tuple[str, ...] = ('source_file', 'month')) -> pd.DataFrame:
+    """Store readings as float32 and repeated labels as categoricals to halve memory per row"""
+    if df.empty:
+        return df
+    
+    if 'state' in df.columns:
+        df['state'] = pd.to_numeric(df['state'], errors='coerce').astype('float32')
+    for col in category_columns:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+def sort_by_timestamp(df: pd.DataFrame, timestamp_col: str = 'last_changed', utc: bool = False) -> pd.DataFrame:
+    """Parse and sort readings by timestamp once so date range filters can binary search"""
+    if df.empty or timestamp_col not in df.columns:
+        return df
+    
+    df[timestamp_col] = pd.to_datetime(df[timestamp_col], errors='coerce', utc=utc, format='ISO8601')
+    df = df.dropna(subset=[timestamp_col])
+    return df.sort_values(timestamp_col, kind='stable', ignore_index=True)
+
+def slice_date_range(df: pd.DataFrame, date_col: str, start_date, end_date) -> pd.DataFrame:
+    """Rows whose date falls in [start_date, end_date + 1 day), sliced by binary search on the sorted column"""
+    if df.empty or date_col not in df.columns:
+        return df
+    
+    # Loaded frames arrive parsed and sorted; anything else is brought into that shape first
+    dates = df[date_col]
+    if not pd.api.types.is_datetime64_any_dtype(dates) or not dates.is_monotonic_increasing:
+        df = df.assign(**{date_col: pd.to_datetime(dates, errors='coerce')})
+        df = df.dropna(subset=[date_col]).sort_values(date_col, kind='stable')
+        dates = df[date_col]
+    
+    # Half-open window in the column's own timezone
+    lower = pd.Timestamp(start_date)
+    upper = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+    if dates.dt.tz is not None:
+        lower, upper = lower.tz_localize(dates.dt.tz), upper.tz_localize(dates.dt.tz)
+    
+    start_idx, end_idx = dates.searchsorted([lower, upper])
+    return df.iloc[start_idx:end_idx].copy()
+
+def positive_diff(values: np.ndarray) -> np.ndarray:
+    """Step-to-step increases of a series (first step 0, decreases clipped to 0) in one NumPy pass"""
+    # A step to or from a missing reading stays NaN, so sums skip it rather than counting a jump
+    deltas = np.diff(values, prepend=values[:1])
+    np.maximum(deltas, 0, out=deltas)
+    return deltas
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Pick row positions with Largest-Triangle-Three-Buckets so the downsampled line keeps its shape"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    # First and last points are always kept; the rest are split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    
+    anchor = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+        
+        # Triangle area between the previous pick, each candidate and the next bucket's centroid
+        area = np.abs(
+            (x[anchor] - next_x) * (y[start:end] - y[anchor])
+            - (x[anchor] - x[start:end]) * (next_y - y[anchor])
+        )
+        anchor = start + int(area.argmax())
+        keep[i + 1] = anchor
+    
+    return keep
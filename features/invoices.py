@@ -0,0 +1,93 @@
+"""
+Invoice Workbook Editing for Solar Performance Dashboard
+=======================================================
+Read and rewrite the billing editor's cells on the sheet Excel opens the workbook on
+"""
+
+import io
+import re
+import zipfile
+from typing import Dict, Tuple
+from xml.sax.saxutils import escape, unescape
+
+import openpyxl
+
+# Invoice cells the billing editor reads and rewrites: period from/to, Freedom Village and Boerdery units
+INVOICE_CELLS = ('B2', 'B3', 'C7', 'C9')
+
+def invoice_sheet(archive: zipfile.ZipFile) -> Tuple[str, str]:
+    """Name and zip member of the workbook's active sheet (its activeTab, else the first), as openpyxl's workbook.active"""
+    workbook_xml = archive.read('xl/workbook.xml').decode('utf-8')
+    rels_xml = archive.read('xl/_rels/workbook.xml.rels').decode('utf-8')
+    
+    active_tab = re.search(r'<workbookView\b[^>]*\bactiveTab="(\d+)"', workbook_xml)
+    sheets = re.findall(r'<sheet\b[^>]*/?>', workbook_xml)
+    tab = int(active_tab.group(1)) if active_tab else 0
+    sheet_tag = sheets[tab if tab < len(sheets) else 0]
+    sheet_name = unescape(re.search(r'\bname="([^"]*)"', sheet_tag).group(1), {'&quot;': '"', '&apos;': "'"})
+    sheet_rel = re.search(r'\br:id="([^"]+)"', sheet_tag).group(1)
+    
+    for relationship in re.findall(r'<Relationship\b[^>]*/>', rels_xml):
+        if f'Id="{sheet_rel}"' in relationship:
+            target = re.search(r'Target="([^"]+)"', relationship).group(1)
+            return sheet_name, target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+    raise KeyError(sheet_rel)
+
+def read_invoice_cells(template: bytes) -> Tuple:
+    """Current values of the editable invoice cells from a read-only, streaming pass over the workbook"""
+    with zipfile.ZipFile(io.BytesIO(template)) as archive:
+        sheet_name, _ = invoice_sheet(archive)
+    
+    workbook = openpyxl.load_workbook(io.BytesIO(template), read_only=True, data_only=False)
+    try:
+        worksheet = workbook[sheet_name]
+        return tuple(worksheet[cell].value for cell in INVOICE_CELLS)
+    finally:
+        workbook.close()
+
+def update_invoice_cells(template: bytes, values: Dict[str, object]) -> bytes:
+    """Invoice workbook with the given cells rewritten in place in the sheet XML, leaving every other part untouched"""
+    with zipfile.ZipFile(io.BytesIO(template)) as source:
+        sheet_name, sheet_path = invoice_sheet(source)
+        sheet_xml = source.read(sheet_path).decode('utf-8')
+        
+        for ref, value in values.items():
+            match = re.search(rf'<c r="{ref}"((?:\s+[^\s=/>]+="[^"]*")*)\s*(?:/>|>.*?</c>)', sheet_xml, re.S)
+            if match is None:
+                # Cell not present in the sheet XML; let openpyxl rebuild the workbook instead
+                workbook = openpyxl.load_workbook(io.BytesIO(template), data_only=False)
+                for cell_ref, cell_value in values.items():
+                    workbook[sheet_name][cell_ref].value = cell_value
+                output_buffer = io.BytesIO()
+                workbook.save(output_buffer)
+                return output_buffer.getvalue()
+            
+            # Keep the cell's style, drop its old type; text goes in inline so sharedStrings is untouched
+            attributes = re.sub(r'\s+t="[^"]*"', '', match.group(1))
+            if isinstance(value, str):
+                cell_xml = f'<c r="{ref}"{attributes} t="inlineStr"><is><t>{escape(value)}</t></is></c>'
+            else:
+                cell_xml = f'<c r="{ref}"{attributes}><v>{value}</v></c>'
+            sheet_xml = sheet_xml[:match.start()] + cell_xml + sheet_xml[match.end():]
+        
+        # Dependent formulas still carry cached results, so ask Excel to recalculate on open
+        workbook_xml = source.read('xl/workbook.xml').decode('utf-8')
+        if 'fullCalcOnLoad' not in workbook_xml:
+            if '<calcPr' in workbook_xml:
+                workbook_xml = workbook_xml.replace('<calcPr', '<calcPr fullCalcOnLoad="1"', 1)
+            else:
+                anchor = max(('</sheets>', '<definedNames/>', '</definedNames>'), key=workbook_xml.rfind)
+                position = workbook_xml.rfind(anchor) + len(anchor)
+                workbook_xml = workbook_xml[:position] + '<calcPr fullCalcOnLoad="1"/>' + workbook_xml[position:]
+        
+        output_buffer = io.BytesIO()
+        with zipfile.ZipFile(output_buffer, 'w') as target:
+            for item in source.infolist():
+                if item.filename == sheet_path:
+                    target.writestr(item, sheet_xml.encode('utf-8'))
+                elif item.filename == 'xl/workbook.xml':
+                    target.writestr(item, workbook_xml.encode('utf-8'))
+                else:
+                    target.writestr(item, source.read(item.filename))
+    
+    return output_buffer.getvalue()
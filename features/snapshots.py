@@ -0,0 +1,87 @@
+"""
+Local Parquet Snapshots for Solar Performance Dashboard
+======================================================
+Parsed remote CSV/Excel files kept on disk and revalidated against the server's ETag
+"""
+
+import contextlib
+import hashlib
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Local Parquet snapshots of parsed remote CSV/Excel files, revalidated against the server's ETag
+SNAPSHOT_DIR = '.cache'
+
+def normalize_excel_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Numeric sensor states and single-typed text columns, so a parsed workbook fits a Parquet snapshot"""
+    df = df.copy()
+    df.columns = df.columns.astype(str)
+    
+    # Home Assistant exports mix numbers with 'unavailable'/'unknown' in the state column
+    if 'state' in df.columns:
+        df['state'] = pd.to_numeric(df['state'], errors='coerce')
+    
+    # Any other column openpyxl left as mixed Python objects (numbers beside labels) is kept as text
+    for col in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[col], skipna=True) not in ('string', 'datetime', 'date', 'empty'):
+            df[col] = df[col].astype('string')
+    
+    return df
+
+def snapshot_paths(url: str) -> Tuple[str, str]:
+    """Parquet snapshot and ETag file for a remote file, named by a hash of its URL"""
+    key = hashlib.sha1(url.encode()).hexdigest()
+    return os.path.join(SNAPSHOT_DIR, f"{key}.parquet"), os.path.join(SNAPSHOT_DIR, f"{key}.etag")
+
+def snapshot_headers(url: str) -> Dict[str, str]:
+    """Conditional GET headers so an unchanged remote file comes back as an empty 304"""
+    parquet_path, etag_path = snapshot_paths(url)
+    try:
+        if os.path.exists(parquet_path):
+            with open(etag_path) as f:
+                return {'If-None-Match': f.read().strip()}
+    except OSError:
+        pass
+    return {}
+
+def content_version(etag: Optional[str], content: bytes) -> str:
+    """Identity of one download: the ETag it was served with, else a hash of its bytes"""
+    return etag or hashlib.sha1(content).hexdigest()
+
+def save_snapshot(url: str, df: pd.DataFrame, etag: Optional[str]) -> None:
+    """Persist a parsed CSV/Excel frame as Parquet alongside the ETag it was served with"""
+    parquet_path, etag_path = snapshot_paths(url)
+    
+    # The previous snapshot goes first, so an ETag-less response or a failed write can never leave
+    # an old ETag revalidating a file that has since changed
+    for path in (etag_path, parquet_path):
+        with contextlib.suppress(OSError):
+            os.remove(path)
+    if not etag:
+        return
+    
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        df.to_parquet(parquet_path, compression='zstd', index=False)
+        with open(etag_path, 'w') as f:
+            f.write(etag)
+    except Exception as e:
+        logger.warning(f"Could not write snapshot for {url}: {e}")
+
+def read_snapshot(url: str) -> Optional[pd.DataFrame]:
+    """Parsed frame from the local Parquet snapshot tagged with its ETag, or None if it cannot be read"""
+    parquet_path, etag_path = snapshot_paths(url)
+    try:
+        df = pd.read_parquet(parquet_path)
+        with open(etag_path) as f:
+            df.attrs['source_version'] = f.read().strip()
+        logger.info(f"Loaded snapshot: {len(df)} rows for {url}")
+        return df
+    except Exception as e:
+        logger.warning(f"Snapshot unreadable for {url}, downloading again: {e}")
+        return None
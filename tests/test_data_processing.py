@@ -0,0 +1,124 @@
+"""
+Shared Data Processing Tests
+============================
+Timestamp sorting, date range slicing and LTTB downsampling used by every dashboard
+"""
+
+import os
+import sys
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from features.data_processing import downcast_sensor_readings, lttb_indices, positive_diff, slice_date_range, sort_by_timestamp
+
+def readings(timestamps):
+    return pd.DataFrame({'last_changed': timestamps, 'state': np.arange(len(timestamps), dtype=float)})
+
+def test_sort_by_timestamp_parses_sorts_and_drops_unparseable_rows():
+    df = sort_by_timestamp(readings(['2025-01-02T00:00:00', 'not a date', '2025-01-01T00:00:00']))
+    
+    assert df['last_changed'].tolist() == [pd.Timestamp('2025-01-01'), pd.Timestamp('2025-01-02')]
+    assert df['state'].tolist() == [2.0, 0.0]
+    assert df.index.tolist() == [0, 1]
+
+def test_sort_by_timestamp_can_normalise_to_utc():
+    df = sort_by_timestamp(readings(['2025-01-01T02:00:00+02:00', '2025-01-01T01:00:00+00:00']), utc=True)
+    
+    assert str(df['last_changed'].dt.tz) == 'UTC'
+    assert df['state'].tolist() == [0.0, 1.0]
+
+def test_sort_by_timestamp_leaves_frames_without_the_column_alone():
+    df = pd.DataFrame({'other': [2, 1]})
+    
+    assert sort_by_timestamp(df) is df
+    assert sort_by_timestamp(pd.DataFrame()).empty
+
+def test_slice_date_range_includes_the_whole_end_date():
+    df = sort_by_timestamp(readings(['2025-01-01T00:00:00', '2025-01-02T23:59:59', '2025-01-03T00:00:00']))
+    
+    sliced = slice_date_range(df, 'last_changed', date(2025, 1, 1), date(2025, 1, 2))
+    
+    assert sliced['state'].tolist() == [0.0, 1.0]
+
+def test_slice_date_range_uses_the_column_timezone():
+    df = sort_by_timestamp(readings(['2024-12-31T23:30:00+00:00', '2025-01-01T00:30:00+00:00']), utc=True)
+    
+    sliced = slice_date_range(df, 'last_changed', date(2025, 1, 1), date(2025, 1, 1))
+    
+    assert sliced['state'].tolist() == [1.0]
+
+def test_slice_date_range_parses_and_sorts_unsorted_string_dates():
+    df = readings(['2025-01-03', '2025-01-01', 'garbage', '2025-01-02'])
+    
+    sliced = slice_date_range(df, 'last_changed', date(2025, 1, 2), date(2025, 1, 3))
+    
+    assert sliced['state'].tolist() == [3.0, 0.0]
+
+def test_slice_date_range_returns_empty_or_unknown_input_unchanged():
+    empty = pd.DataFrame(columns=['last_changed'])
+    
+    assert slice_date_range(empty, 'last_changed', date(2025, 1, 1), date(2025, 1, 2)) is empty
+    assert slice_date_range(readings(['2025-01-01']), 'missing', date(2025, 1, 1), date(2025, 1, 2)).shape == (1, 2)
+
+def test_lttb_keeps_short_series_and_degenerate_targets_whole():
+    x = np.arange(10, dtype=float)
+    
+    assert lttb_indices(x, x, 10).tolist() == list(range(10))
+    assert lttb_indices(x, x, 50).tolist() == list(range(10))
+    assert lttb_indices(x, x, 2).tolist() == list(range(10))
+
+def test_lttb_keeps_endpoints_and_returns_increasing_positions():
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 20)
+    
+    keep = lttb_indices(x, y, 100)
+    
+    assert len(keep) == 100
+    assert keep[0] == 0 and keep[-1] == 999
+    assert np.all(np.diff(keep) > 0)
+
+def test_lttb_keeps_a_lone_spike():
+    x = np.arange(500, dtype=float)
+    y = np.zeros(500)
+    y[321] = 50.0
+    
+    assert 321 in lttb_indices(x, y, 20)
+
+def test_positive_diff_keeps_increases_and_clips_resets():
+    deltas = positive_diff(np.array([10.0, 12.5, 12.5, 3.0, 4.0]))
+    
+    assert deltas.tolist() == [0.0, 2.5, 0.0, 0.0, 1.0]
+
+def test_positive_diff_of_empty_input_is_empty():
+    assert positive_diff(np.array([], dtype=float)).size == 0
+
+def test_positive_diff_leaves_steps_around_missing_readings_as_nan():
+    deltas = positive_diff(np.array([1.0, np.nan, 3.0, 5.0]))
+    
+    assert np.isnan(deltas[1]) and np.isnan(deltas[2])
+    assert deltas[[0, 3]].tolist() == [0.0, 2.0]
+    assert np.nansum(deltas) == 2.0
+
+def test_downcast_sensor_readings_shrinks_states_and_default_labels():
+    df = pd.DataFrame({'entity_id': ['a', 'b'], 'state': ['1.5', 'unavailable'], 'month': ['Jan', 'Jan']})
+    
+    df = downcast_sensor_readings(df)
+    
+    assert df['state'].dtype == 'float32'
+    assert df['state'].isna().tolist() == [False, True]
+    assert isinstance(df['month'].dtype, pd.CategoricalDtype)
+    assert not isinstance(df['entity_id'].dtype, pd.CategoricalDtype)
+
+def test_downcast_sensor_readings_uses_the_given_category_columns():
+    df = pd.DataFrame({'entity_id': ['a', 'a'], 'state': [1, 2]})
+    
+    df = downcast_sensor_readings(df, category_columns=('entity_id', 'source_file'))
+    
+    assert isinstance(df['entity_id'].dtype, pd.CategoricalDtype)
+    assert 'source_file' not in df.columns
+    assert downcast_sensor_readings(pd.DataFrame()).empty
@@ -0,0 +1,73 @@
+"""
+Invoice Editing Tests
+=====================
+The billing editor must read and patch the same sheet and leave every other part alone
+"""
+
+import io
+import os
+import sys
+import zipfile
+from datetime import datetime
+
+import openpyxl
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from features.invoices import INVOICE_CELLS, read_invoice_cells, update_invoice_cells
+
+def read_template():
+    with open(os.path.join(ROOT, 'September 2025.xlsx'), 'rb') as f:
+        return f.read()
+
+def test_patched_invoice_reopens_with_the_new_values():
+    template = read_template()
+    values = {'B2': '2025-10-01', 'B3': '2025-10-31', 'C7': 12345.5, 'C9': 678}
+    
+    patched = update_invoice_cells(template, values)
+    
+    workbook = openpyxl.load_workbook(io.BytesIO(patched))
+    assert tuple(workbook.active[cell].value for cell in INVOICE_CELLS) == tuple(values.values())
+    assert read_invoice_cells(patched) == tuple(values.values())
+
+def test_patch_only_touches_the_sheet_and_workbook_parts():
+    template = read_template()
+    
+    patched = update_invoice_cells(template, {'B2': 'From <start> & more', 'C7': 1})
+    
+    with zipfile.ZipFile(io.BytesIO(template)) as before, zipfile.ZipFile(io.BytesIO(patched)) as after:
+        assert before.namelist() == after.namelist()
+        changed = [name for name in before.namelist() if before.read(name) != after.read(name)]
+        assert changed == ['xl/worksheets/sheet1.xml', 'xl/workbook.xml']
+        assert before.read('xl/sharedStrings.xml') == after.read('xl/sharedStrings.xml')
+    assert read_invoice_cells(patched)[0] == 'From <start> & more'
+
+def test_reads_and_patches_the_active_sheet_when_it_is_not_the_first():
+    workbook = openpyxl.Workbook()
+    workbook.active.title = 'Notes'
+    invoice = workbook.create_sheet('Sept & Oct')
+    for cell in INVOICE_CELLS:
+        workbook['Notes'][cell] = 'notes'
+        invoice[cell] = 'invoice'
+    workbook.active = 1
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    
+    assert read_invoice_cells(buffer.getvalue()) == ('invoice',) * len(INVOICE_CELLS)
+    
+    patched = openpyxl.load_workbook(io.BytesIO(update_invoice_cells(buffer.getvalue(), {'C7': 42})))
+    assert patched['Sept & Oct']['C7'].value == 42
+    assert patched['Notes']['C7'].value == 'notes'
+
+def test_missing_cell_falls_back_to_openpyxl_on_the_same_sheet():
+    workbook = openpyxl.Workbook()
+    workbook.create_sheet('Invoice')['B2'] = datetime(2025, 9, 1)
+    workbook.active = 1
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    
+    patched = openpyxl.load_workbook(io.BytesIO(update_invoice_cells(buffer.getvalue(), {'C9': 7})))
+    
+    assert patched['Invoice']['C9'].value == 7
+    assert patched['Sheet']['C9'].value is None
@@ -0,0 +1,55 @@
+"""
+Snapshot Round-Trip Tests
+=========================
+Every bundled workbook must survive a Parquet snapshot unchanged
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from features import snapshots
+
+WORKBOOKS = ['gen (2).xlsx', 'history (5).xlsx', 'September 2025.xlsx', 'Durr bottling Generator filling.xlsx']
+
+@pytest.mark.parametrize('workbook', WORKBOOKS)
+def test_workbook_round_trips_through_snapshot(workbook, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'SNAPSHOT_DIR', str(tmp_path))
+    url = f"https://example.invalid/{workbook}"
+    df = snapshots.normalize_excel_frame(pd.read_excel(os.path.join(ROOT, workbook)))
+    
+    snapshots.save_snapshot(url, df, '"etag-1"')
+    
+    assert snapshots.snapshot_headers(url) == {'If-None-Match': '"etag-1"'}
+    pd.testing.assert_frame_equal(snapshots.read_snapshot(url), df)
+
+def test_unavailable_states_become_missing():
+    df = snapshots.normalize_excel_frame(pd.DataFrame({'state': [1.5, 'unavailable', 3]}))
+    
+    assert df['state'].dtype == 'float64'
+    assert df['state'].isna().tolist() == [False, True, False]
+
+def test_response_without_etag_discards_previous_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'SNAPSHOT_DIR', str(tmp_path))
+    url = "https://example.invalid/gen.xlsx"
+    df = pd.DataFrame({'state': [1.0, 2.0]})
+    
+    snapshots.save_snapshot(url, df, '"etag-1"')
+    snapshots.save_snapshot(url, df, None)
+    
+    assert snapshots.snapshot_headers(url) == {}
+    assert os.listdir(tmp_path) == []
+
+def test_snapshot_carries_the_version_it_was_served_with(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'SNAPSHOT_DIR', str(tmp_path))
+    url = "https://example.invalid/gen.xlsx"
+    
+    snapshots.save_snapshot(url, pd.DataFrame({'state': [1.0]}), '"etag-2"')
+    
+    assert snapshots.read_snapshot(url).attrs['source_version'] == '"etag-2"'
+    assert snapshots.content_version(None, b'a') != snapshots.content_version(None, b'b')